@@ -1,5 +1,21 @@
+import os
+
 COOKIE_KEY = "labmate_session"
 MAX_COOKIE_AGE = 3600
+SESSION_RENEWAL_INTERVAL = 300
+SESSION_SWEEP_INTERVAL = 600
+SESSION_SWEEP_BATCH_SIZE = 1000
+SESSION_CACHE_TTL = 60
+SESSION_CACHE_MAX_SIZE = 4096
+API_KEY_CACHE_TTL = 30
+API_KEY_CACHE_MAX_SIZE = 1024
+MAX_CHART_POINTS = 20_000
+DOWNSAMPLE_CACHE_TTL = 300
+DOWNSAMPLE_CACHE_MAX_SIZE = 256
+DATABASE_SESSION_MODE = "database"
+SIGNED_SESSION_MODE = "signed"
+SESSION_MODE = os.getenv("SESSION_MODE", DATABASE_SESSION_MODE).lower()
+REVOCATION_REFRESH_INTERVAL = 15
 ADMIN_USERNAME = "admin"
 RESERVED_USERNAMES = (
     ADMIN_USERNAME,
@@ -13,5 +29,6 @@ RESERVED_USERNAMES = (
     "experiments",
     "archives",
     "measurements",
+    "search",
 )
 PUBLIC_ENDPOINTS = ("", "register", "login", "logout", "static", "check_username_taken")
@@ -1,7 +1,12 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
 
+from app.config import SESSION_MODE, SIGNED_SESSION_MODE
 from app.routes.admin import router as admin
 from app.routes.archives import router as archives
 from app.routes.auth import router as auth
@@ -11,13 +16,41 @@ from app.routes.experiments import router as experiments
 from app.routes.measurements import router as measurements
 from app.routes.pages import router as pages
 from app.routes.samples import router as samples
+from app.routes.search import router as search
+from app.services.database import async_engine, engine
 from app.services.middleware import AuthMiddleware
 from app.services.resources import static_files
-from app.services.tasks import create_admin_user
+from app.services.revocation import revocation_filter
+from app.services.security import shutdown_password_executor
+from app.services.tasks import (
+    create_admin_user,
+    get_demo_samples,
+    sweep_expired_sessions_periodically,
+)
 
 create_admin_user()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(get_demo_samples)
+    background_tasks = [asyncio.create_task(sweep_expired_sessions_periodically())]
+    if SESSION_MODE == SIGNED_SESSION_MODE:
+        await run_in_threadpool(revocation_filter.refresh)
+        background_tasks.append(
+            asyncio.create_task(revocation_filter.refresh_periodically())
+        )
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    shutdown_password_executor()
+    engine.dispose()
+    await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(auth)
 app.include_router(pages)
@@ -26,6 +59,7 @@ app.include_router(samples)
 app.include_router(experiments)
 app.include_router(archives)
 app.include_router(measurements)
+app.include_router(search)
 app.include_router(contact)
 app.include_router(admin)
 
@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import HTMLResponse
 
-from app.services.crud.auth import get_current_user
+from app.services.crud.auth import get_current_user, revoke_user_sessions
 from app.services.crud.user import (
     calculate_storage_size_for_user,
     search_user,
 )
-from app.services.database import DbSession, get_db
+from app.services.database import DbSession, get_db, get_pool_statistics
 from app.services.models import ContactResponse, User, UserRole
 from app.services.resources import templates
 
@@ -54,6 +54,7 @@ def deactivate_user(
         )
     user.active = False
     db.commit()
+    revoke_user_sessions(db, user.id)
 
     return templates.TemplateResponse(
         "partials/admin/user_active_status_button.html",
@@ -70,6 +71,7 @@ def activate_user(
     user = db.query(User).filter(User.id == user_id).first()
     user.active = True
     db.commit()
+    revoke_user_sessions(db, user.id)
 
     return templates.TemplateResponse(
         "partials/admin/user_active_status_button.html",
@@ -87,6 +89,7 @@ def change_user_role(
     user = db.query(User).filter(User.id == user_id).first()
     user.role = role
     db.commit()
+    revoke_user_sessions(db, user.id)
 
     return templates.TemplateResponse(
         "partials/admin/user_row.html",
@@ -129,3 +132,8 @@ def delete_message(
     db.delete(message)
     db.commit()
     return HTMLResponse()
+
+
+@router.get("/pool/")
+def get_database_pool_statistics():
+    return get_pool_statistics()
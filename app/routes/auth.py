@@ -1,20 +1,24 @@
-import time
+import asyncio
 from typing import Annotated
 
 from fastapi import APIRouter, BackgroundTasks, Depends, Form, Request, Response
 from fastapi.responses import RedirectResponse
 
-from app.config import COOKIE_KEY, MAX_COOKIE_AGE, RESERVED_USERNAMES
+from app.config import COOKIE_KEY, RESERVED_USERNAMES
+from app.services.crud.aio.auth import (
+    login_user,
+    register_user_if_not_registered,
+)
 from app.services.crud.auth import (
     get_current_user,
-    login_user,
     logout_user,
-    register_user_if_not_registered,
+    set_session_cookie,
 )
 from app.services.crud.user import (
     get_user_by_username,
 )
-from app.services.database import DbSession, get_db
+from app.services.database import AsyncDbSession, DbSession, get_async_db, get_db
+from app.services.errors import PasswordHashingBusyError
 from app.services.models import User
 from app.services.resources import templates
 from app.services.tasks import populate_demo_data_on_registration
@@ -29,11 +33,11 @@ def error_response(endpoint: str, message: str, request: Request):
 
 
 @router.post("/register")
-def register(
+async def register(
     request: Request,
     username: Annotated[str, Form()],
     password: Annotated[str, Form()],
-    db: DbSession = Depends(get_db),
+    async_db: AsyncDbSession = Depends(get_async_db),
     *,
     background_tasks: BackgroundTasks,
 ):
@@ -44,39 +48,42 @@ def register(
             request,
         )
 
-    user = register_user_if_not_registered(db, username, password)
+    try:
+        user = await register_user_if_not_registered(async_db, username, password)
+    except PasswordHashingBusyError:
+        return error_response(
+            "register", "Too many requests, please try again shortly.", request
+        )
     if not user:
-        time.sleep(1)
+        await asyncio.sleep(1)
         return error_response(
             "register",
             f"Username {username} already exists, please choose another.",
             request,
         )
-    background_tasks.add_task(populate_demo_data_on_registration, db, user)
+    background_tasks.add_task(populate_demo_data_on_registration, user.id)
     return RedirectResponse(url="/login", status_code=303)
 
 
 @router.post("/login")
-def login(
+async def login(
     request: Request,
     response: Response,
     username: Annotated[str, Form()],
     password: Annotated[str, Form()],
-    db: DbSession = Depends(get_db),
+    db: AsyncDbSession = Depends(get_async_db),
 ):
-    session = login_user(db, username, password)
-    if not session:
+    try:
+        session_token = await login_user(db, username, password)
+    except PasswordHashingBusyError:
+        return error_response(
+            "login", "Too many login attempts, please try again shortly.", request
+        )
+    if not session_token:
         return error_response("login", "Invalid username or password", request)
 
     response = RedirectResponse("/", status_code=303)
-    response.set_cookie(
-        key=COOKIE_KEY,
-        value=session.session_token,
-        secure=True,
-        httponly=True,
-        samesite="Lax",
-        max_age=MAX_COOKIE_AGE,
-    )
+    set_session_cookie(response, session_token)
     return response
 
 
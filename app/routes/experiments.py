@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, Form, Request, Response
+from fastapi import APIRouter, Depends, Form, Query, Request, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
 
 from app.services import schemas
-from app.services.crud.auth import get_current_user
-from app.services.crud.experiments import (
+from app.services.crud.auth import get_request_user
+from app.services.crud.aio.experiments import (
     archive_user_experiment_by_id,
     create_user_experiment,
     delete_user_experiment_by_id,
@@ -14,26 +14,34 @@ from app.services.crud.experiments import (
     search_user_experiments,
     unarchive_user_experiment_by_id,
 )
-from app.services.crud.linked_entities import (
+from app.services.crud.aio.linked_entities import (
     link_sample_and_experiment,
     unlink_sample_and_experiment,
 )
-from app.services.crud.samples import (
+from app.services.crud.aio.samples import (
     get_user_samples_by_family,
     search_unique_lab_sample_families,
 )
-from app.services.database import DbSession, get_db
+from app.services.database import AsyncDbSession, get_async_db
+from app.services.etags import (
+    cache_headers,
+    entity_etag,
+    etag_matches,
+    experiment_detail_version,
+    not_modified,
+)
 from app.services.models import User
 from app.services.resources import templates
+from app.services.search import MAX_SEARCH_RESULTS
 
 router = APIRouter(prefix="/experiments", tags=["experiments"])
 
 
 @router.get("/")
-def get_experiments_page(
+async def get_experiments_page(
     request: Request,
-    user: User = Depends(get_current_user),
-    db: DbSession = Depends(get_db),
+    user: User = Depends(get_request_user),
+    db: AsyncDbSession = Depends(get_async_db),
     skip: int = 0,
     limit: int = 20,
 ):
@@ -42,7 +50,7 @@ def get_experiments_page(
         {
             "request": request,
             "user": user,
-            "experiments": get_user_experiments(db, user, skip, limit),
+            "experiments": await get_user_experiments(db, user, skip, limit),
             "skip": skip,
             "limit": limit,
         },
@@ -52,8 +60,8 @@ def get_experiments_page(
 @router.post("/")
 async def create_experiments(
     request: Request,
-    user: User = Depends(get_current_user),
-    db: DbSession = Depends(get_db),
+    user: User = Depends(get_request_user),
+    db: AsyncDbSession = Depends(get_async_db),
 ):
     form_data = await request.form()
 
@@ -63,7 +71,7 @@ async def create_experiments(
             {"request": request, "experiment": None},
         )
 
-    experiment = create_user_experiment(
+    experiment = await create_user_experiment(
         db=db,
         user=user,
         **form_data,
@@ -76,18 +84,22 @@ async def create_experiments(
 
 
 @router.get("/{experiment_id}")
-def get_experiment_by_id(
+async def get_experiment_by_id(
     request: Request,
     experiment_id: int,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
-    experiment = get_user_experiment_by_id(db, user, experiment_id)
-    attached_samples = experiment.lab_samples
-
+    experiment = await get_user_experiment_by_id(db, user, experiment_id)
     if experiment is None:
         return RedirectResponse("/experiments", status_code=303)
 
+    etag = entity_etag(request, user, experiment_detail_version(experiment))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    attached_samples = experiment.lab_samples
+
     return templates.TemplateResponse(
         "pages/experiment_detail.html",
         {
@@ -98,6 +110,7 @@ def get_experiment_by_id(
                 {sample.family for sample in attached_samples}
             ),
         },
+        headers=cache_headers(etag),
     )
 
 
@@ -105,11 +118,11 @@ def get_experiment_by_id(
 async def edit_experiment_by_id(
     request: Request,
     experiment_id: int,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
     form_data = await request.form()
-    updated_experiment = edit_user_experiment_by_id(
+    updated_experiment = await edit_user_experiment_by_id(
         db, user, experiment_id, schemas.Experiment(**form_data)
     )
     if not updated_experiment:
@@ -122,48 +135,48 @@ async def edit_experiment_by_id(
 
 
 @router.post("/{experiment_id}/archive/")
-def archive_experiment_by_id(
+async def archive_experiment_by_id(
     experiment_id: int,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
-    experiment = archive_user_experiment_by_id(db, user, experiment_id)
+    experiment = await archive_user_experiment_by_id(db, user, experiment_id)
     if experiment is None:
         return Response(status_code=404)
     return HTMLResponse()
 
 
 @router.post("/{experiment_id}/unarchive/")
-def unarchive_experiment_by_id(
+async def unarchive_experiment_by_id(
     experiment_id: int,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
-    experiment = unarchive_user_experiment_by_id(db, user, experiment_id)
+    experiment = await unarchive_user_experiment_by_id(db, user, experiment_id)
     if experiment is None:
         return Response(status_code=404)
     return HTMLResponse()
 
 
 @router.delete("/{experiment_id}")
-def delete_experiment_by_id(
+async def delete_experiment_by_id(
     experiment_id: int,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
-    deleted_experiment = delete_user_experiment_by_id(db, user, experiment_id)
+    deleted_experiment = await delete_user_experiment_by_id(db, user, experiment_id)
     if deleted_experiment is None:
         return Response(status_code=404)
     return HTMLResponse()
 
 
 @router.get("/archived/")
-def get_archived_experiments(
+async def get_archived_experiments(
     request: Request,
-    user: User = Depends(get_current_user),
-    db: DbSession = Depends(get_db),
+    user: User = Depends(get_request_user),
+    db: AsyncDbSession = Depends(get_async_db),
 ):
-    archived_experiments = get_user_archived_experiments(db, user)
+    archived_experiments = await get_user_archived_experiments(db, user)
     return templates.TemplateResponse(
         "partials/experiments/table.html",
         {"request": request, "experiments": archived_experiments, "archived": True},
@@ -175,16 +188,20 @@ async def search_experiments(
     request: Request,
     linkable: bool = False,
     sample_id: int = None,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_SEARCH_RESULTS),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
     form_data = await request.form()
     search_term = form_data.get("search_term")
-    experiments = search_user_experiments(
+    experiments = await search_user_experiments(
         db,
         user,
         search_term,
         exclude_sample_id=sample_id,
+        skip=skip,
+        limit=limit,
     )
 
     return templates.TemplateResponse(
@@ -200,16 +217,16 @@ async def search_experiments(
 
 
 @router.post("/{experiment_id}/link/")
-def link_sample(
+async def link_sample(
     request: Request,
     experiment_id: int,
     entity_type: str,
     entity_identifier: int | str,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
     if entity_type == "sample":
-        experiment, sample = link_sample_and_experiment(
+        experiment, sample = await link_sample_and_experiment(
             db, user, experiment_id, entity_identifier
         )
         if experiment is None or sample is None:
@@ -221,8 +238,10 @@ def link_sample(
         )
 
     if entity_type == "sample_family":
-        samples_in_family = get_user_samples_by_family(db, user, entity_identifier)
-        experiment = get_user_experiment_by_id(db, user, experiment_id)
+        samples_in_family = await get_user_samples_by_family(
+            db, user, entity_identifier
+        )
+        experiment = await get_user_experiment_by_id(db, user, experiment_id)
         new_samples = list(
             {
                 sample
@@ -231,7 +250,7 @@ def link_sample(
             }
         )
         experiment.lab_samples.extend(new_samples)
-        db.commit()
+        await db.commit()
 
         return templates.TemplateResponse(
             "pages/experiment_detail.html",
@@ -249,16 +268,16 @@ def link_sample(
 
 
 @router.post("/{experiment_id}/unlink/")
-def unlink_sample(
+async def unlink_sample(
     request: Request,
     experiment_id: int,
     entity_type: str,
     entity_identifier: int | str,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
     if entity_type == "sample":
-        experiment, _ = unlink_sample_and_experiment(
+        experiment, _ = await unlink_sample_and_experiment(
             db, user, experiment_id, entity_identifier
         )
         if experiment is None:
@@ -270,7 +289,7 @@ def unlink_sample(
         )
 
     if entity_type == "sample_family":
-        experiment = get_user_experiment_by_id(db, user, experiment_id)
+        experiment = await get_user_experiment_by_id(db, user, experiment_id)
         samples_to_remove = [
             sample
             for sample in experiment.lab_samples
@@ -278,7 +297,7 @@ def unlink_sample(
         ]
         for sample in samples_to_remove:
             experiment.lab_samples.remove(sample)
-        db.commit()
+        await db.commit()
 
         return HTMLResponse()
 
@@ -290,10 +309,10 @@ async def search_samples_by_family(
     request: Request,
     experiment_id: int,
     search_term: str = Form(...),
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
-    samples = search_unique_lab_sample_families(db, user, search_term)
+    samples = await search_unique_lab_sample_families(db, user, search_term)
     return templates.TemplateResponse(
         "partials/samples/families.html",
         {"request": request, "samples": samples, "experiment_id": experiment_id},
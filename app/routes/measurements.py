@@ -1,16 +1,42 @@
-from fastapi import APIRouter, Depends, File, Form, Request, Response, UploadFile
-from fastapi.responses import HTMLResponse
+import polars as pl
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import HTMLResponse, ORJSONResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 
-from app.services.crud.auth import get_current_user
-from app.services.crud.measurements import (
+from app.config import MAX_CHART_POINTS
+from app.services.cache import downsample_cache
+from app.services.crud.auth import get_request_user
+from app.services.crud.aio.measurements import (
     create_user_measurement,
     delete_user_measurement,
     edit_user_measurement_by_id,
     get_user_measurement_by_id,
+    get_user_measurement_payload,
     get_user_measurements,
+    query_user_measurements,
     search_user_measurements,
 )
-from app.services.database import DbSession, get_db
+from app.services.database import AsyncDbSession, get_async_db
+from app.services.downsampling import read_measurement_window
+from app.services.etags import (
+    cache_headers,
+    entity_etag,
+    etag_matches,
+    measurement_version,
+    not_modified,
+)
 from app.services.errors import (
     CSVFieldError,
     DataPointNotInEveryVariableError,
@@ -19,6 +45,18 @@ from app.services.errors import (
 from app.services.file_handler import parse_measurements
 from app.services.models import User
 from app.services.resources import templates
+from app.services.schemas import MeasurementQuery
+from app.services.search import MAX_SEARCH_RESULTS
+from app.services.wire import (
+    ARROW_STREAM_MEDIA_TYPE,
+    FLOAT64_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    encode_arrow_stream,
+    encode_float64_columns,
+    encode_json,
+    encode_msgpack,
+    negotiate_media_type,
+)
 
 ENDPOINT = "measurements"
 
@@ -26,14 +64,14 @@ router = APIRouter(prefix=f"/{ENDPOINT}", tags=[ENDPOINT])
 
 
 @router.get("/")
-def measurements_page(
+async def measurements_page(
     request: Request,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
     skip: int = 0,
     limit: int = 20,
 ):
-    measurements = get_user_measurements(db, user)
+    measurements = await get_user_measurements(db, user)
 
     return templates.TemplateResponse(
         "pages/measurements.html",
@@ -47,14 +85,72 @@ def measurements_page(
     )
 
 
+def get_measurement_query(request: Request) -> MeasurementQuery:
+    """Depends(MeasurementQuery) would drop the Field constraints from the
+    query parameters and fail with a 500 on out of range values, so the
+    model validates the query string itself and errors become a 422."""
+    try:
+        return MeasurementQuery.model_validate(dict(request.query_params))
+    except ValidationError as error:
+        raise RequestValidationError(
+            [
+                {**detail, "loc": ("query", *detail["loc"])}
+                for detail in error.errors(include_url=False)
+            ]
+        ) from error
+
+
+@router.get("/query/")
+async def query_measurements(
+    query: MeasurementQuery = Depends(get_measurement_query),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
+):
+    measurements, samples = await query_user_measurements(db, user, query)
+    # Returning the response directly skips jsonable_encoder; orjson handles
+    # the datetimes itself.
+    return ORJSONResponse(
+        {
+            "measurements": [
+                {
+                    "id": measurement.id,
+                    "name": measurement.name,
+                    "variables": measurement.variables,
+                    "statistics": measurement.statistics,
+                    "row_count": measurement.row_count,
+                    "created_at": measurement.created_at,
+                    "lab_sample_id": measurement.lab_sample_id,
+                }
+                for measurement in measurements
+            ],
+            "samples": [
+                {
+                    "id": sample.id,
+                    "formula": sample.formula,
+                    "label": sample.label,
+                    "format": sample.format,
+                    "family": sample.family,
+                }
+                for sample in samples
+            ],
+        }
+    )
+
+
 @router.get("/{measurement_id}")
-def measurement_detail(
+async def measurement_detail(
     request: Request,
     measurement_id: int,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
-    measurement = get_user_measurement_by_id(db, user, measurement_id)
+    measurement = await get_user_measurement_by_id(db, user, measurement_id)
+    if measurement is None:
+        return Response(status_code=404)
+
+    etag = entity_etag(request, user, measurement_version(measurement))
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
     return templates.TemplateResponse(
         "pages/measurement_detail.html",
@@ -64,6 +160,7 @@ def measurement_detail(
             "measurement": measurement,
             "request_endpoint": f"{ENDPOINT}/{measurement_id}/data/",
         },
+        headers=cache_headers(etag),
     )
 
 
@@ -71,11 +168,11 @@ def measurement_detail(
 async def edit_measurement_by_id(
     request: Request,
     measurement_id: int,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
     form_data = await request.form()
-    measurement = edit_user_measurement_by_id(
+    measurement = await edit_user_measurement_by_id(
         db, user, measurement_id, form_data.get("name")
     )
     if not measurement:
@@ -93,23 +190,118 @@ async def edit_measurement_by_id(
 
 
 @router.get("/{measurement_id}/data/")
-def measurement_data(
+async def measurement_data(
+    request: Request,
     measurement_id: int,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    x: str | None = None,
+    y: str | None = None,
+    variables: list[str] | None = Query(None),
+    x_min: float | None = None,
+    x_max: float | None = None,
+    points: int | None = Query(None, ge=2, le=MAX_CHART_POINTS),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
-    return get_user_measurement_by_id(db, user, measurement_id)
+    measurement = await get_user_measurement_by_id(db, user, measurement_id)
+    if measurement is None:
+        return Response(status_code=404)
+    if x_min is not None and x_max is not None and x_min > x_max:
+        return Response(status_code=422)
+
+    media_type = negotiate_media_type(request.headers.get("accept"))
+
+    # Only metadata has been loaded so far; a match skips the data entirely.
+    etag = entity_etag(
+        request,
+        user,
+        measurement_version(measurement),
+        request.url.query,
+        media_type,
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    names = [variable["name"] for variable in measurement.variables]
+    window = pl.DataFrame()
+    if names:
+        x = x or names[0]
+        y = y or names[min(1, len(names) - 1)]
+        variables = variables or [y]
+        if x not in names or any(name not in names for name in variables):
+            return Response(status_code=422)
+
+        cache_key = (
+            measurement.id,
+            measurement.updated_at,
+            x,
+            tuple(variables),
+            x_min,
+            x_max,
+            points,
+        )
+        window = downsample_cache.get(cache_key)
+        if window is None:
+            x_statistics = (measurement.statistics or {}).get(x, {})
+            x_sorted = bool(x_statistics.get("sorted")) and not x_statistics.get(
+                "nan_count"
+            )
+            payload = await get_user_measurement_payload(db, user, measurement_id)
+            if payload is None:
+                return Response(status_code=404)
+            try:
+                window = await run_in_threadpool(
+                    read_measurement_window,
+                    payload.data,
+                    payload.pyramid,
+                    x,
+                    variables,
+                    points,
+                    x_min,
+                    x_max,
+                    x_sorted,
+                )
+            except ValueError:
+                return Response(status_code=422)
+            # Full-resolution reads are left out, as they hold every row.
+            if points is not None:
+                downsample_cache.set(cache_key, window, tag=measurement.id)
+
+    metadata = jsonable_encoder(
+        {
+            "id": measurement.id,
+            "name": measurement.name,
+            "variables": measurement.variables,
+            "row_count": measurement.row_count,
+            "created_at": measurement.created_at,
+            "updated_at": measurement.updated_at,
+            "lab_sample_id": measurement.lab_sample_id,
+            "x": x,
+            "y": y,
+            "x_min": x_min,
+            "x_max": x_max,
+        }
+    )
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        content = encode_arrow_stream(window)
+    elif media_type == FLOAT64_MEDIA_TYPE:
+        content = encode_float64_columns(window, metadata)
+    elif media_type == MSGPACK_MEDIA_TYPE:
+        content = encode_msgpack(window, metadata)
+    else:
+        content = encode_json(window, metadata)
+    return Response(content=content, media_type=media_type, headers=cache_headers(etag))
 
 
 @router.delete("/{measurement_id}")
-def delete_measurement(
+async def delete_measurement(
     measurement_id: int,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
-    deleted_measurement = delete_user_measurement(db, user, measurement_id)
+    deleted_measurement = await delete_user_measurement(db, user, measurement_id)
     if deleted_measurement is None:
         return Response(status_code=404)
+    downsample_cache.invalidate_tag(measurement_id)
     return HTMLResponse()
 
 
@@ -129,8 +321,8 @@ async def upload_measurement(
     request: Request,
     name: str = Form(None),
     file: UploadFile = File(...),
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
     if not file.filename.endswith(".csv"):
         return measurements_upload_response_error(request, "File must be a CSV!")
@@ -149,7 +341,7 @@ async def upload_measurement(
             request, "Data point missing variable!"
         )
 
-    create_user_measurement(
+    await create_user_measurement(
         db=db,
         user=user,
         measurement_data=measurement_data,
@@ -161,7 +353,7 @@ async def upload_measurement(
             "request": request,
             "upload_entity": "measurements",
             "measurement_name": name,
-            "data_points_count": len(measurement_data.data_points),
+            "data_points_count": measurement_data.data.height,
         },
     )
 
@@ -169,15 +361,21 @@ async def upload_measurement(
 @router.post("/search/")
 async def search_measurements(
     request: Request,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_SEARCH_RESULTS),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
     form_data = await request.form()
-    search_term = form_data.get("search_term")
-    measurements = search_user_measurements(
+    search_term = form_data.get("search_term", "")
+    measurements = await search_user_measurements(
         db,
         user,
         search_term,
+        variable_name=form_data.get("variable_name", "").strip(),
+        variable_unit=form_data.get("variable_unit", "").strip(),
+        skip=skip,
+        limit=limit,
     )
     return templates.TemplateResponse(
         "partials/measurements/table.html",
@@ -1,25 +1,44 @@
-from datetime import UTC, datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, File, Form, Request, Response, UploadFile
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
 from fastapi.responses import HTMLResponse, RedirectResponse
 
 from app.services import schemas
-from app.services.crud.auth import get_current_user
-from app.services.crud.linked_entities import (
+from app.services.crud.auth import get_request_user
+from app.services.crud.aio.linked_entities import (
     add_measurements_to_user_sample,
 )
-from app.services.crud.samples import (
+from app.services.crud.aio.samples import (
     archive_user_sample_by_id,
+    create_user_sample,
+    create_user_samples,
     delete_user_sample_by_id,
     edit_user_sample_by_id,
     get_user_archived_samples,
     get_user_sample_by_id,
+    get_user_sample_detail_by_id,
     get_user_samples,
     search_user_samples,
     unarchive_user_sample_by_id,
+    upsert_user_samples,
+)
+from app.services.database import AsyncDbSession, get_async_db
+from app.services.etags import (
+    cache_headers,
+    entity_etag,
+    etag_matches,
+    not_modified,
+    sample_detail_version,
 )
-from app.services.database import DbSession, get_db
 from app.services.errors import (
     CSVFieldError,
     DataPointNotInEveryVariableError,
@@ -28,19 +47,24 @@ from app.services.errors import (
 from app.services.file_handler import parse_measurements, parse_user_samples
 from app.services.models import LabSample, User
 from app.services.resources import templates
+from app.services.search import MAX_SEARCH_RESULTS
 
 router = APIRouter(prefix="/samples", tags=["samples"])
 
+APPEND_IMPORT_MODE = "append"
+UPSERT_IMPORT_MODE = "upsert"
+IMPORT_MODES = (APPEND_IMPORT_MODE, UPSERT_IMPORT_MODE)
+
 
 @router.get("/")
 async def get_user_samples_page(
     request: Request,
     skip: int = 0,
     limit: int = 50,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
-    samples = get_user_samples(db, user, skip, limit)
+    samples = await get_user_samples(db, user, skip, limit)
     return templates.TemplateResponse(
         "pages/samples.html",
         {
@@ -57,13 +81,17 @@ async def get_user_samples_page(
 async def get_sample_by_id(
     request: Request,
     sample_id: int,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
-    sample = get_user_sample_by_id(db, user, sample_id)
+    sample = await get_user_sample_detail_by_id(db, user, sample_id)
     if sample is None:
         return RedirectResponse("/samples", status_code=303)
 
+    etag = entity_etag(request, user, sample_detail_version(sample))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     return templates.TemplateResponse(
         "pages/sample_detail.html",
         {
@@ -74,33 +102,15 @@ async def get_sample_by_id(
             "sample_id": sample_id,
             "linkable": True,
         },
+        headers=cache_headers(etag),
     )
 
 
-def create_user_sample(
-    db: DbSession,
-    user: User,
-    sample_data: schemas.LabSample,
-) -> LabSample:
-    now = datetime.now(tz=UTC)
-    sample = LabSample(
-        user_id=user.id,
-        created_at=now,
-        updated_at=now,
-        **sample_data.model_dump(),
-    )
-
-    db.add(sample)
-    db.commit()
-    db.refresh(sample)
-    return sample
-
-
 @router.post("/")
 async def create_sample(
     request: Request,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
     form_data = await request.form()
     if not any(form_data.values()):
@@ -109,7 +119,7 @@ async def create_sample(
             {"request": request, "sample": None},
         )
 
-    sample = create_user_sample(
+    sample = await create_user_sample(
         db=db,
         user=user,
         sample_data=schemas.LabSample.model_validate(form_data),
@@ -124,11 +134,11 @@ async def create_sample(
 async def edit_sample_by_id(
     request: Request,
     sample_id: int,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
     form_data = await request.form()
-    updated_sample = edit_user_sample_by_id(
+    updated_sample = await edit_user_sample_by_id(
         db, user, sample_id, schemas.LabSample(**form_data)
     )
     if not updated_sample:
@@ -141,12 +151,12 @@ async def edit_sample_by_id(
 
 
 @router.post("/{sample_id}/archive/")
-def archive_sample_by_id(
+async def archive_sample_by_id(
     sample_id: int,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
-    sample = archive_user_sample_by_id(db, user, sample_id)
+    sample = await archive_user_sample_by_id(db, user, sample_id)
     if sample is None:
         return Response(status_code=404)
     return HTMLResponse()
@@ -155,10 +165,10 @@ def archive_sample_by_id(
 @router.post("/{sample_id}/unarchive/")
 async def unarchive_sample_by_id(
     sample_id: int,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
-    sample = unarchive_user_sample_by_id(db, user, sample_id)
+    sample = await unarchive_user_sample_by_id(db, user, sample_id)
     if sample is None:
         return Response(status_code=404)
     return HTMLResponse()
@@ -167,10 +177,10 @@ async def unarchive_sample_by_id(
 @router.delete("/{sample_id}")
 async def delete_sample_by_id(
     sample_id: int,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
-    deleted_sample = delete_user_sample_by_id(db, user, sample_id)
+    deleted_sample = await delete_user_sample_by_id(db, user, sample_id)
     if deleted_sample is None:
         return Response(status_code=404)
     return HTMLResponse()
@@ -179,10 +189,10 @@ async def delete_sample_by_id(
 @router.get("/archived/")
 async def get_archived_samples(
     request: Request,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
-    archived_samples = get_user_archived_samples(db, user)
+    archived_samples = await get_user_archived_samples(db, user)
     return templates.TemplateResponse(
         "partials/samples/table.html",
         {"request": request, "samples": archived_samples, "archived": True},
@@ -193,8 +203,9 @@ async def get_archived_samples(
 async def upload_samples_file(
     request: Request,
     file: UploadFile = File(...),
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    mode: str = Form(APPEND_IMPORT_MODE),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
     if not file.filename.endswith(".csv"):
         return templates.TemplateResponse(
@@ -205,22 +216,50 @@ async def upload_samples_file(
             },
         )
 
+    if mode not in IMPORT_MODES:
+        return templates.TemplateResponse(
+            "partials/samples/upload_response.html",
+            {
+                "request": request,
+                "error": f"Unknown import mode {mode}!",
+            },
+        )
+
     contents = await file.read()
     await file.close()
 
-    samples = await parse_user_samples(contents)
+    try:
+        samples, invalid_count = await parse_user_samples(contents)
+    except CSVFieldError:
+        return templates.TemplateResponse(
+            "partials/samples/upload_response.html",
+            {
+                "request": request,
+                "error": "Invalid CSV file!",
+            },
+        )
 
-    for sample in samples:
-        if sample is not None:
-            create_user_sample(db, user, sample)
+    updated_count = unchanged_count = duplicate_count = None
+    if mode == APPEND_IMPORT_MODE:
+        created_count = await create_user_samples(db, user, samples)
+    else:
+        (
+            created_count,
+            updated_count,
+            unchanged_count,
+            duplicate_count,
+        ) = await upsert_user_samples(db, user, samples)
 
     return templates.TemplateResponse(
         "partials/samples/upload_response.html",
         {
             "request": request,
             "upload_entity": "samples",
-            "samples_created_count": len(samples),
-            "sample_created_error_count": samples.count(None),
+            "samples_created_count": created_count,
+            "samples_updated_count": updated_count,
+            "samples_unchanged_count": unchanged_count,
+            "samples_duplicate_count": duplicate_count,
+            "sample_created_error_count": invalid_count,
         },
     )
 
@@ -228,16 +267,14 @@ async def upload_samples_file(
 @router.post("/search/")
 async def search_samples(
     request: Request,
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_SEARCH_RESULTS),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
     form_data = await request.form()
     search_term = form_data.get("search_term")
-    samples = search_user_samples(
-        db,
-        user,
-        search_term,
-    )
+    samples = await search_user_samples(db, user, search_term, skip, limit)
     return templates.TemplateResponse(
         "partials/samples/table.html",
         {"request": request, "samples": samples},
@@ -264,13 +301,13 @@ async def upload_sample_measurement(
     sample_id: int,
     name: Annotated[str, Form()] | None = None,
     file: UploadFile = File(...),
-    db: DbSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
 ):
     if not name:
         name = file.filename.replace(".csv", "")
 
-    sample = get_user_sample_by_id(db, user, sample_id)
+    sample = await get_user_sample_by_id(db, user, sample_id)
 
     if not file.filename.endswith(".csv"):
         return measurements_upload_response_error(
@@ -295,7 +332,7 @@ async def upload_sample_measurement(
             request, sample, "Data point missing variable!"
         )
 
-    add_measurements_to_user_sample(
+    await add_measurements_to_user_sample(
         db=db,
         user=user,
         sample_id=sample_id,
@@ -309,6 +346,6 @@ async def upload_sample_measurement(
             "upload_entity": "measurements",
             "sample": sample,
             "measurement_name": name,
-            "data_points_count": len(measurement_data.data_points),
+            "data_points_count": measurement_data.data.height,
         },
     )
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, Query, Request
+
+from app.services.crud.auth import get_request_user
+from app.services.crud.aio.search import search_user_entities
+from app.services.database import AsyncDbSession, get_async_db
+from app.services.models import User
+from app.services.resources import templates
+from app.services.search import ENTITY_PATHS, MAX_SEARCH_RESULTS
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("/")
+async def get_search_page(
+    request: Request,
+    user: User = Depends(get_request_user),
+):
+    return templates.TemplateResponse(
+        "pages/search.html",
+        {
+            "request": request,
+            "user": user,
+            "entries": [],
+            "entity_paths": ENTITY_PATHS,
+        },
+    )
+
+
+@router.get("/results/")
+async def search_entities(
+    request: Request,
+    search_term: str = "",
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_SEARCH_RESULTS),
+    db: AsyncDbSession = Depends(get_async_db),
+    user: User = Depends(get_request_user),
+):
+    entries = await search_user_entities(db, user, search_term, skip, limit)
+    return templates.TemplateResponse(
+        "partials/search/results.html",
+        {"request": request, "entries": entries, "entity_paths": ENTITY_PATHS},
+    )
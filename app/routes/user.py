@@ -1,7 +1,11 @@
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import RedirectResponse
 
-from app.services.crud.auth import create_user_api_key, get_current_user
+from app.services.crud.auth import (
+    create_user_api_key,
+    get_current_user,
+    invalidate_cached_user,
+)
 from app.services.crud.user import (
     calculate_storage_size_for_user,
     delete_all_user_entities,
@@ -74,8 +78,10 @@ def delete_api_key(
     db: DbSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
+    user.api_key_id = None
     user.hashed_api_key = None
     db.commit()
+    invalidate_cached_user(user.id)
     return templates.TemplateResponse(
         "partials/user/create_api_key_action.html",
         {
@@ -0,0 +1,85 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable
+
+from app.config import (
+    API_KEY_CACHE_MAX_SIZE,
+    API_KEY_CACHE_TTL,
+    DOWNSAMPLE_CACHE_MAX_SIZE,
+    DOWNSAMPLE_CACHE_TTL,
+    SESSION_CACHE_MAX_SIZE,
+    SESSION_CACHE_TTL,
+)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Entries can be tagged (e.g. with a user id) so that every entry belonging
+    to the tag can be dropped at once.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Hashable, Any]] = (
+            OrderedDict()
+        )
+        self._tags: dict[Hashable, set[Hashable]] = {}
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, _, value = entry
+            if expires_at < time.monotonic():
+                self._pop(key)
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, tag: Hashable = None) -> None:
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, tag, value)
+            if tag is not None:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._pop(next(iter(self._entries)))
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def invalidate_tag(self, tag: Hashable) -> None:
+        with self._lock:
+            for key in self._tags.pop(tag, set()):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _pop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        tag = entry[1]
+        if tag is not None:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+session_cache = TTLCache(maxsize=SESSION_CACHE_MAX_SIZE, ttl=SESSION_CACHE_TTL)
+api_key_cache = TTLCache(maxsize=API_KEY_CACHE_MAX_SIZE, ttl=API_KEY_CACHE_TTL)
+downsample_cache = TTLCache(maxsize=DOWNSAMPLE_CACHE_MAX_SIZE, ttl=DOWNSAMPLE_CACHE_TTL)
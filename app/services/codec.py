@@ -0,0 +1,77 @@
+from io import BytesIO
+
+import polars as pl
+
+from app.services import schemas
+from app.services.pyramid import build_pyramid
+from app.services.statistics import summarise_variables
+
+MEASUREMENT_DATA_COMPRESSION = "zstd"
+
+
+def encode_measurement_data(data: pl.DataFrame) -> bytes:
+    """Serialise measurement data as a compressed Arrow IPC file.
+
+    Every variable is stored as one typed, contiguous column, so a value costs
+    its native width instead of a JSON key and string.
+    """
+    buffer = BytesIO()
+    data.write_ipc(buffer, compression=MEASUREMENT_DATA_COMPRESSION)
+    return buffer.getvalue()
+
+
+def decode_measurement_data(
+    payload: bytes | None, columns: list[str] | None = None
+) -> pl.DataFrame:
+    if not payload:
+        return pl.DataFrame()
+    return pl.read_ipc(BytesIO(payload), columns=columns, memory_map=False)
+
+
+def encoded_column_names(payload: bytes | None) -> list[str]:
+    if not payload:
+        return []
+    return list(pl.read_ipc_schema(BytesIO(payload)))
+
+
+def coerce_numeric_columns(data: pl.DataFrame) -> pl.DataFrame:
+    """Cast text columns to Float64 wherever every value parses as a number."""
+    text_columns = [name for name, dtype in data.schema.items() if dtype == pl.String]
+    if not text_columns:
+        return data
+
+    null_counts = data.select(
+        [pl.col(name).null_count().alias(name) for name in text_columns]
+        + [
+            pl.col(name)
+            .str.strip_chars()
+            .cast(pl.Float64, strict=False)
+            .null_count()
+            .alias(f"{name}__numeric")
+            for name in text_columns
+        ]
+    ).row(0, named=True)
+
+    numeric_columns = [
+        name
+        for name in text_columns
+        if null_counts[f"{name}__numeric"] == null_counts[name]
+    ]
+    return data.with_columns(
+        [
+            pl.col(name).str.strip_chars().cast(pl.Float64, strict=False)
+            for name in numeric_columns
+        ]
+    )
+
+
+def measurement_columns(measurement_data: schemas.Measurements) -> dict:
+    pyramid = build_pyramid(measurement_data.data)
+    return {
+        "name": measurement_data.name,
+        "variables": [variable.model_dump() for variable in measurement_data.variables],
+        "data": encode_measurement_data(measurement_data.data),
+        "row_count": measurement_data.data.height,
+        "statistics": summarise_variables(measurement_data.data),
+        "pyramid": None if pyramid is None else encode_measurement_data(pyramid),
+    }
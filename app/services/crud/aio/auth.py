@@ -0,0 +1,70 @@
+from sqlalchemy import delete, select
+
+from app.config import SESSION_MODE, SIGNED_SESSION_MODE
+from app.services.crud.auth import invalidate_cached_user, issue_signed_session_token
+from app.services.database import AsyncDbSession
+from app.services.models import User, UserSession, utc_now
+from app.services.security import (
+    hash_password_bcrypted,
+    run_password_task,
+    verify_password,
+    verify_password_bcrypted,
+)
+
+
+async def get_user_by_username(db: AsyncDbSession, username: str) -> User | None:
+    return await db.scalar(select(User).filter(User.username == username))
+
+
+async def create_user_session(db: AsyncDbSession, user: User) -> str:
+    if SESSION_MODE == SIGNED_SESSION_MODE:
+        return issue_signed_session_token(user)
+
+    await db.execute(delete(UserSession).where(UserSession.user_id == user.id))
+
+    session = UserSession(
+        user_id=user.id,
+    )
+    db.add(session)
+    await db.commit()
+    invalidate_cached_user(user.id)
+    return session.session_token
+
+
+async def register_user_if_not_registered(
+    db: AsyncDbSession, username: str, password: str
+) -> User | None:
+    if await get_user_by_username(db, username) is not None:
+        return None
+
+    user = User(
+        username=username,
+        hashed_password=await run_password_task(hash_password_bcrypted, password),
+        created_at=utc_now(),
+    )
+    try:
+        db.add(user)
+        await db.commit()
+        return user
+    except Exception:
+        await db.rollback()
+        return None
+
+
+async def login_user(db: AsyncDbSession, username: str, password: str) -> str | None:
+    user = await get_user_by_username(db, username)
+    if not user or not user.active:
+        return None
+
+    if not await run_password_task(
+        verify_password_bcrypted, user.hashed_password, password
+    ):
+        if await run_password_task(verify_password, user.hashed_password, password):
+            user.hashed_password = await run_password_task(
+                hash_password_bcrypted, password
+            )
+            await db.commit()
+            return await create_user_session(db, user)
+        return None
+
+    return await create_user_session(db, user)
@@ -0,0 +1,189 @@
+from sqlalchemy import select
+
+from app.services import schemas
+from app.services.crud.aio.linked_entities import (
+    EXPERIMENT_ROW_OPTIONS,
+    get_experiments_not_linked_to_sample,
+)
+from app.services.database import AsyncDbSession
+from app.services.models import Experiment, LabSample, User, utc_now
+from app.services.search import (
+    EXPERIMENT_SEARCH_TEXT,
+    MAX_SEARCH_RESULTS,
+    by_relevance,
+    matches,
+)
+
+
+async def get_user_experiments(
+    db: AsyncDbSession, user: User, skip: int, limit: int
+) -> list[Experiment]:
+    if limit > 100:
+        limit = 100
+    is_archived = False
+    experiments = await db.scalars(
+        select(Experiment)
+        .options(*EXPERIMENT_ROW_OPTIONS)
+        .filter(
+            Experiment.user_id == user.id,
+            Experiment.is_archived == is_archived,
+        )
+        .offset(skip)
+        .limit(limit)
+    )
+    return experiments.all()
+
+
+async def create_user_experiment(
+    db: AsyncDbSession,
+    user: User,
+    name: str,
+    description: str,
+    sample_families: list[str] | None = None,
+) -> Experiment:
+    now = utc_now()
+    experiment = Experiment(
+        user_id=user.id,
+        created_at=now,
+        updated_at=now,
+        name=name,
+        description=description,
+    )
+
+    if sample_families:
+        samples = await db.scalars(
+            select(LabSample).filter(
+                LabSample.user_id == user.id, LabSample.family.in_(sample_families)
+            )
+        )
+        experiment.lab_samples.extend(samples.all())
+
+    db.add(experiment)
+    await db.commit()
+    await db.refresh(experiment, ["lab_samples", "methods"])
+    return experiment
+
+
+async def get_user_experiment_by_id(
+    db: AsyncDbSession, user: User, experiment_id: int
+) -> Experiment | None:
+    return await db.scalar(
+        select(Experiment)
+        .options(*EXPERIMENT_ROW_OPTIONS)
+        .filter(Experiment.id == experiment_id, Experiment.user_id == user.id)
+    )
+
+
+async def edit_user_experiment_by_id(
+    db: AsyncDbSession,
+    user: User,
+    experiment_id: int,
+    experiment_data: schemas.Experiment,
+) -> Experiment | None:
+    experiment = await get_user_experiment_by_id(db, user, experiment_id)
+    if experiment is None:
+        return None
+    experiment.name = experiment_data.name
+    experiment.description = experiment_data.description
+    experiment.updated_at = utc_now()
+    await db.commit()
+    return experiment
+
+
+async def get_user_archived_experiments(
+    db: AsyncDbSession, user: User
+) -> list[Experiment]:
+    experiments = await db.scalars(
+        select(Experiment)
+        .options(*EXPERIMENT_ROW_OPTIONS)
+        .filter(Experiment.user_id == user.id, Experiment.is_archived)
+    )
+    return experiments.all()
+
+
+async def archive_user_experiment_by_id(
+    db: AsyncDbSession,
+    user: User,
+    experiment_id: int,
+) -> bool | None:
+    experiment = await db.scalar(
+        select(Experiment).filter(
+            Experiment.id == experiment_id, Experiment.user_id == user.id
+        )
+    )
+    if experiment is None:
+        return None
+    experiment.is_archived = True
+    await db.commit()
+    return True
+
+
+async def unarchive_user_experiment_by_id(
+    db: AsyncDbSession, user: User, experiment_id: int
+) -> bool | None:
+    experiment = await db.scalar(
+        select(Experiment).filter(
+            Experiment.id == experiment_id, Experiment.user_id == user.id
+        )
+    )
+    if experiment is None:
+        return None
+    experiment.is_archived = False
+    await db.commit()
+    return True
+
+
+async def delete_user_experiment_by_id(
+    db: AsyncDbSession,
+    user: User,
+    experiment_id: int,
+) -> bool | None:
+    experiment = await get_user_experiment_by_id(db, user, experiment_id)
+    if experiment is None:
+        return None
+    await db.delete(experiment)
+    await db.commit()
+    return True
+
+
+async def search_user_experiments(
+    db: AsyncDbSession,
+    user: User,
+    search_term: str,
+    exclude_sample_id: int | None = None,
+    skip: int = 0,
+    limit: int = 50,
+) -> list[Experiment]:
+    if limit > MAX_SEARCH_RESULTS:
+        limit = MAX_SEARCH_RESULTS
+    if exclude_sample_id:
+        return await get_experiments_not_linked_to_sample(
+            db, user, exclude_sample_id, search_term, skip, limit
+        )
+
+    if search_term.isdigit():
+        experiments = await db.scalars(
+            select(Experiment)
+            .options(*EXPERIMENT_ROW_OPTIONS)
+            .filter(Experiment.id == int(search_term), Experiment.user_id == user.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return experiments.all()
+
+    search_term = search_term.strip().lower()
+
+    experiments = await db.scalars(
+        select(Experiment)
+        .options(*EXPERIMENT_ROW_OPTIONS)
+        .filter(
+            Experiment.user_id == user.id,
+            matches(EXPERIMENT_SEARCH_TEXT, search_term),
+        )
+        .order_by(
+            by_relevance(EXPERIMENT_SEARCH_TEXT, search_term), Experiment.id.desc()
+        )
+        .offset(skip)
+        .limit(limit)
+    )
+    return experiments.all()
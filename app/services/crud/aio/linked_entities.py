@@ -0,0 +1,118 @@
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from starlette.concurrency import run_in_threadpool
+
+from app.services import schemas
+from app.services.codec import measurement_columns
+from app.services.crud.aio.measurements import build_variable_statistics
+from app.services.crud.aio.samples import SAMPLE_DETAIL_OPTIONS
+from app.services.database import AsyncDbSession
+from app.services.models import Experiment, LabSample, Measurement, User, utc_now
+from app.services.search import EXPERIMENT_SEARCH_TEXT, by_relevance, matches
+
+EXPERIMENT_ROW_OPTIONS = (
+    selectinload(Experiment.lab_samples),
+    selectinload(Experiment.methods),
+)
+
+
+async def add_measurements_to_user_sample(
+    db: AsyncDbSession,
+    user: User,
+    sample_id: int,
+    measurement_data: schemas.Measurements,
+) -> Measurement:
+    # Encoding and building the pyramid are CPU bound on large uploads.
+    columns = await run_in_threadpool(measurement_columns, measurement_data)
+    now = utc_now()
+    measurement = Measurement(
+        user_id=user.id,
+        lab_sample_id=sample_id,
+        created_at=now,
+        updated_at=now,
+        variable_statistics=build_variable_statistics(user, columns),
+        **columns,
+    )
+    db.add(measurement)
+    await db.commit()
+    return measurement
+
+
+async def get_experiments_not_linked_to_sample(
+    db: AsyncDbSession,
+    user: User,
+    sample_id: int,
+    search_term: str,
+    skip: int = 0,
+    limit: int = 50,
+) -> list[Experiment]:
+    query = (
+        select(Experiment)
+        .options(*EXPERIMENT_ROW_OPTIONS)
+        .filter(
+            Experiment.user_id == user.id,
+            ~Experiment.lab_samples.any(LabSample.id == sample_id),
+        )
+    )
+    if search_term.isdigit():
+        query = query.filter(Experiment.id == int(search_term))
+    else:
+        query = query.filter(matches(EXPERIMENT_SEARCH_TEXT, search_term)).order_by(
+            by_relevance(EXPERIMENT_SEARCH_TEXT, search_term), Experiment.id.desc()
+        )
+
+    experiments = await db.scalars(query.offset(skip).limit(limit))
+    return experiments.all()
+
+
+async def link_sample_and_experiment(
+    db: AsyncDbSession, user: User, experiment_id: int, sample_id: int
+) -> tuple[Experiment, LabSample] | tuple[None, None]:
+    experiment = await db.scalar(
+        select(Experiment)
+        .options(*EXPERIMENT_ROW_OPTIONS)
+        .filter(
+            Experiment.id == experiment_id,
+            Experiment.user_id == user.id,
+        )
+    )
+    sample = await db.scalar(
+        select(LabSample)
+        .options(*SAMPLE_DETAIL_OPTIONS)
+        .filter(
+            LabSample.id == sample_id,
+            LabSample.user_id == user.id,
+        )
+    )
+    if experiment is None or sample is None:
+        return None, None
+    if sample not in experiment.lab_samples:
+        experiment.lab_samples.append(sample)
+        await db.commit()
+    return experiment, sample
+
+
+async def unlink_sample_and_experiment(
+    db: AsyncDbSession, user: User, experiment_id: int, sample_id: int
+) -> tuple[Experiment, LabSample] | tuple[None, None]:
+    experiment = await db.scalar(
+        select(Experiment)
+        .options(*EXPERIMENT_ROW_OPTIONS)
+        .filter(
+            Experiment.id == experiment_id,
+            Experiment.user_id == user.id,
+        )
+    )
+    sample = await db.scalar(
+        select(LabSample)
+        .options(selectinload(LabSample.experiments))
+        .filter(
+            LabSample.id == sample_id,
+            LabSample.user_id == user.id,
+        )
+    )
+    if experiment is None or sample is None or sample not in experiment.lab_samples:
+        return None, None
+    experiment.lab_samples.remove(sample)
+    await db.commit()
+    return experiment, sample
@@ -0,0 +1,219 @@
+from sqlalchemy import ColumnElement, select
+from starlette.concurrency import run_in_threadpool
+
+from app.services import schemas
+from app.services.codec import measurement_columns
+from app.services.database import AsyncDbSession
+from app.services.models import (
+    LabSample,
+    Measurement,
+    MeasurementVariableStatistics,
+    User,
+    utc_now,
+)
+from app.services.search import (
+    MAX_SEARCH_RESULTS,
+    MEASUREMENT_SEARCH_TEXT,
+    by_relevance,
+    matches,
+)
+
+VARIABLE_STATISTICS = ("min", "max", "mean", "std", "count", "nan_count", "sorted")
+
+
+def build_variable_statistics(
+    user: User, columns: dict
+) -> list[MeasurementVariableStatistics]:
+    statistics = columns["statistics"]
+    return [
+        MeasurementVariableStatistics(
+            user_id=user.id,
+            name=variable["name"],
+            unit=variable["unit"],
+            **{
+                statistic: statistics.get(variable["name"], {}).get(statistic)
+                for statistic in VARIABLE_STATISTICS
+            },
+        )
+        for variable in columns["variables"]
+    ]
+
+
+def variable_filters(
+    variable_name: str | None, variable_unit: str | None
+) -> list[ColumnElement[bool]]:
+    """Containment on the variables JSONB, served by its GIN index."""
+    variable = {
+        key: value
+        for key, value in (("name", variable_name), ("unit", variable_unit))
+        if value
+    }
+    if not variable:
+        return []
+    return [Measurement.variables.contains([variable])]
+
+
+async def get_user_measurements(
+    db: AsyncDbSession, user: User, skip: int = 0, limit: int = 20
+) -> list[Measurement]:
+    if limit > 100:
+        limit = 100
+    measurements = await db.scalars(
+        select(Measurement)
+        .filter(Measurement.user_id == user.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return measurements.all()
+
+
+async def get_user_measurement_by_id(
+    db: AsyncDbSession, user: User, measurement_id: int
+) -> Measurement | None:
+    return await db.scalar(
+        select(Measurement).filter(
+            Measurement.id == measurement_id,
+            Measurement.user_id == user.id,
+        )
+    )
+
+
+async def get_user_measurement_payload(
+    db: AsyncDbSession, user: User, measurement_id: int
+) -> tuple[bytes | None, bytes | None] | None:
+    """The encoded data and pyramid of a measurement, deferred everywhere else."""
+    row = await db.execute(
+        select(Measurement.data, Measurement.pyramid).filter(
+            Measurement.id == measurement_id,
+            Measurement.user_id == user.id,
+        )
+    )
+    return row.first()
+
+
+async def delete_user_measurement(
+    db: AsyncDbSession, user: User, measurement_id: int
+) -> bool | None:
+    measurement = await get_user_measurement_by_id(db, user, measurement_id)
+    if measurement is None:
+        return None
+    await db.delete(measurement)
+    await db.commit()
+    return True
+
+
+async def create_user_measurement(
+    db: AsyncDbSession, user: User, measurement_data: schemas.Measurements
+) -> Measurement:
+    # Encoding and building the pyramid are CPU bound on large uploads.
+    columns = await run_in_threadpool(measurement_columns, measurement_data)
+    now = utc_now()
+    measurement = Measurement(
+        user_id=user.id,
+        created_at=now,
+        updated_at=now,
+        variable_statistics=build_variable_statistics(user, columns),
+        **columns,
+    )
+    db.add(measurement)
+    await db.commit()
+    return measurement
+
+
+async def edit_user_measurement_by_id(
+    db: AsyncDbSession, user: User, measurement_id: int, measurement_name: str
+) -> Measurement | None:
+    measurement = await get_user_measurement_by_id(db, user, measurement_id)
+    if measurement is None:
+        return None
+    measurement.name = measurement_name
+    measurement.updated_at = utc_now()
+    await db.commit()
+    return measurement
+
+
+async def search_user_measurements(
+    db: AsyncDbSession,
+    user: User,
+    search_term: str,
+    variable_name: str | None = None,
+    variable_unit: str | None = None,
+    skip: int = 0,
+    limit: int = 50,
+) -> list[Measurement]:
+    if limit > MAX_SEARCH_RESULTS:
+        limit = MAX_SEARCH_RESULTS
+    query = select(Measurement).filter(
+        Measurement.user_id == user.id,
+        *variable_filters(variable_name, variable_unit),
+    )
+    if search_term.isdigit():
+        measurements = await db.scalars(
+            query.filter(Measurement.id == int(search_term)).offset(skip).limit(limit)
+        )
+        return measurements.all()
+
+    search_term = search_term.strip().lower()
+
+    measurements = await db.scalars(
+        query.filter(matches(MEASUREMENT_SEARCH_TEXT, search_term))
+        .order_by(
+            by_relevance(MEASUREMENT_SEARCH_TEXT, search_term), Measurement.id.desc()
+        )
+        .offset(skip)
+        .limit(limit)
+    )
+    return measurements.all()
+
+
+async def query_user_measurements(
+    db: AsyncDbSession, user: User, query: schemas.MeasurementQuery
+) -> tuple[list[Measurement], list[LabSample]]:
+    statistics = MeasurementVariableStatistics
+    conditions = [statistics.user_id == user.id]
+    if query.variable is not None:
+        conditions.append(statistics.name == query.variable)
+    if query.unit is not None:
+        conditions.append(statistics.unit == query.unit)
+    if query.min_gte is not None:
+        conditions.append(statistics.min >= query.min_gte)
+    if query.min_lte is not None:
+        conditions.append(statistics.min <= query.min_lte)
+    if query.max_gte is not None:
+        conditions.append(statistics.max >= query.max_gte)
+    if query.max_lte is not None:
+        conditions.append(statistics.max <= query.max_lte)
+    if query.covers_from is not None:
+        conditions.append(statistics.min <= query.covers_from)
+    if query.covers_to is not None:
+        conditions.append(statistics.max >= query.covers_to)
+
+    measurements = (
+        await db.scalars(
+            select(Measurement)
+            .filter(
+                Measurement.user_id == user.id,
+                Measurement.id.in_(
+                    select(statistics.measurement_id).filter(*conditions)
+                ),
+            )
+            .order_by(Measurement.id)
+            .limit(query.limit)
+        )
+    ).all()
+
+    sample_ids = {
+        measurement.lab_sample_id
+        for measurement in measurements
+        if measurement.lab_sample_id is not None
+    }
+    samples = []
+    if sample_ids:
+        samples = (
+            await db.scalars(
+                select(LabSample)
+                .filter(LabSample.id.in_(sample_ids), LabSample.user_id == user.id)
+                .order_by(LabSample.id)
+            )
+        ).all()
+    return measurements, samples
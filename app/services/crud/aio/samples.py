@@ -0,0 +1,317 @@
+from sqlalchemy import exists, insert, literal_column, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased, selectinload
+
+from app.services import schemas
+from app.services.database import AsyncDbSession
+from app.services.models import Experiment, LabSample, User, utc_now
+from app.services.search import (
+    MAX_SEARCH_RESULTS,
+    SAMPLE_SEARCH_TEXT,
+    by_relevance,
+    matches,
+)
+
+IMPORT_KEY_SEPARATOR = "\x1f"
+# Keeps each upsert below asyncpg's limit of 32767 bind parameters.
+UPSERT_BATCH_SIZE = 1000
+
+SAMPLE_DETAIL_OPTIONS = (
+    selectinload(LabSample.measurements),
+    selectinload(LabSample.experiments).selectinload(Experiment.lab_samples),
+    selectinload(LabSample.experiments).selectinload(Experiment.methods),
+)
+
+
+async def get_user_samples(
+    db: AsyncDbSession, user: User, skip: int, limit: int
+) -> list[LabSample]:
+    if limit > 100:
+        limit = 100
+    is_archived = False
+    samples = await db.scalars(
+        select(LabSample)
+        .filter(LabSample.user_id == user.id, LabSample.is_archived == is_archived)
+        .offset(skip)
+        .limit(limit)
+    )
+    return samples.all()
+
+
+async def create_user_sample(
+    db: AsyncDbSession,
+    user: User,
+    sample_data: schemas.LabSample,
+) -> LabSample:
+    now = utc_now()
+    sample = LabSample(
+        user_id=user.id,
+        created_at=now,
+        updated_at=now,
+        **sample_data.model_dump(),
+    )
+
+    db.add(sample)
+    await db.commit()
+    return sample
+
+
+async def create_user_samples(
+    db: AsyncDbSession,
+    user: User,
+    samples_data: list[schemas.LabSample],
+) -> int:
+    """Insert all samples in one executemany, committed as one transaction."""
+    if not samples_data:
+        return 0
+
+    now = utc_now()
+    await db.execute(
+        insert(LabSample),
+        [
+            {
+                "user_id": user.id,
+                "created_at": now,
+                "updated_at": now,
+                **sample_data.model_dump(),
+            }
+            for sample_data in samples_data
+        ],
+    )
+    await db.commit()
+    return len(samples_data)
+
+
+def sample_import_key(sample_data: schemas.LabSample) -> str:
+    return f"{sample_data.label}{IMPORT_KEY_SEPARATOR}{sample_data.family}"
+
+
+async def key_user_samples(
+    db: AsyncDbSession, user: User, import_keys: list[str]
+) -> None:
+    """Key the newest unkeyed sample of each label and family in
+    `import_keys` that has no keyed sample yet.
+
+    Samples appended, added one by one or seeded are stored unkeyed, so an
+    upsert would otherwise insert them a second time.
+    """
+    import_key = LabSample.label + IMPORT_KEY_SEPARATOR + LabSample.family
+    keyed = aliased(LabSample)
+    unkeyed = (
+        select(LabSample.id, import_key.label("import_key"))
+        .filter(
+            LabSample.user_id == user.id,
+            LabSample.import_key.is_(None),
+            import_key.in_(import_keys),
+            ~exists().where(keyed.user_id == user.id, keyed.import_key == import_key),
+        )
+        .distinct(LabSample.label, LabSample.family)
+        .order_by(LabSample.label, LabSample.family, LabSample.id.desc())
+        .subquery()
+    )
+    await db.execute(
+        update(LabSample)
+        .where(LabSample.id == unkeyed.c.id)
+        .values(import_key=unkeyed.c.import_key)
+    )
+
+
+async def upsert_user_samples(
+    db: AsyncDbSession,
+    user: User,
+    samples_data: list[schemas.LabSample],
+) -> tuple[int, int, int, int]:
+    """Insert new samples and update those already imported, matched on
+    label and family.
+
+    Rows whose formula and format are unchanged are left alone, including
+    their updated_at. Only the first sheet row for each label and family is
+    written. Returns the inserted, updated, unchanged and duplicate counts.
+    """
+    # A statement may only touch each key once, so repeats are rejected.
+    rows_by_key: dict[str, schemas.LabSample] = {}
+    for sample_data in samples_data:
+        rows_by_key.setdefault(sample_import_key(sample_data), sample_data)
+    duplicate_count = len(samples_data) - len(rows_by_key)
+    now = utc_now()
+    rows = [
+        {
+            "user_id": user.id,
+            "import_key": import_key,
+            "created_at": now,
+            "updated_at": now,
+            "is_archived": False,
+            **sample_data.model_dump(),
+        }
+        for import_key, sample_data in rows_by_key.items()
+    ]
+
+    inserted_count = updated_count = 0
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start : start + UPSERT_BATCH_SIZE]
+        await key_user_samples(db, user, [row["import_key"] for row in batch])
+        statement = pg_insert(LabSample).values(batch)
+        statement = statement.on_conflict_do_update(
+            index_elements=[LabSample.user_id, LabSample.import_key],
+            set_={
+                "formula": statement.excluded.formula,
+                "format": statement.excluded.format,
+                "updated_at": statement.excluded.updated_at,
+            },
+            where=or_(
+                LabSample.formula.is_distinct_from(statement.excluded.formula),
+                LabSample.format.is_distinct_from(statement.excluded.format),
+            ),
+        ).returning(literal_column("xmax = 0").label("inserted"))
+        results = (await db.execute(statement)).scalars().all()
+        inserted = sum(results)
+        inserted_count += inserted
+        updated_count += len(results) - inserted
+    await db.commit()
+
+    unchanged_count = len(rows_by_key) - inserted_count - updated_count
+    return inserted_count, updated_count, unchanged_count, duplicate_count
+
+
+async def edit_user_sample_by_id(
+    db: AsyncDbSession, user: User, sample_id: int, sample_data: schemas.LabSample
+) -> LabSample | None:
+    sample = await get_user_sample_detail_by_id(db, user, sample_id)
+    if sample is None:
+        return None
+    if (sample.label, sample.family) != (sample_data.label, sample_data.family):
+        # A renamed sample no longer stands for its sheet row, which a
+        # re-import would otherwise write over it.
+        sample.import_key = None
+    sample.label = sample_data.label
+    sample.family = sample_data.family
+    sample.format = sample_data.format
+    sample.formula = sample_data.formula
+    sample.updated_at = utc_now()
+    await db.commit()
+    return sample
+
+
+async def get_user_sample_by_id(
+    db: AsyncDbSession, user: User, sample_id: int
+) -> LabSample | None:
+    return await db.scalar(
+        select(LabSample).filter(
+            LabSample.id == sample_id, LabSample.user_id == user.id
+        )
+    )
+
+
+async def get_user_sample_detail_by_id(
+    db: AsyncDbSession, user: User, sample_id: int
+) -> LabSample | None:
+    return await db.scalar(
+        select(LabSample)
+        .options(*SAMPLE_DETAIL_OPTIONS)
+        .filter(LabSample.id == sample_id, LabSample.user_id == user.id)
+    )
+
+
+async def archive_user_sample_by_id(
+    db: AsyncDbSession,
+    user: User,
+    sample_id: int,
+) -> bool | None:
+    sample = await get_user_sample_by_id(db, user, sample_id)
+    if sample is None:
+        return None
+    sample.is_archived = True
+    await db.commit()
+    return True
+
+
+async def unarchive_user_sample_by_id(
+    db: AsyncDbSession, user: User, sample_id: int
+) -> bool | None:
+    sample = await get_user_sample_by_id(db, user, sample_id)
+    if sample is None:
+        return None
+    sample.is_archived = False
+    await db.commit()
+    return True
+
+
+async def get_user_archived_samples(db: AsyncDbSession, user: User) -> list[LabSample]:
+    samples = await db.scalars(
+        select(LabSample).filter(LabSample.user_id == user.id, LabSample.is_archived)
+    )
+    return samples.all()
+
+
+async def delete_user_sample_by_id(
+    db: AsyncDbSession,
+    user: User,
+    sample_id: int,
+) -> bool | None:
+    sample = await db.scalar(
+        select(LabSample)
+        .options(
+            selectinload(LabSample.measurements),
+            selectinload(LabSample.experiments),
+        )
+        .filter(LabSample.id == sample_id, LabSample.user_id == user.id)
+    )
+    if sample is None:
+        return None
+    await db.delete(sample)
+    await db.commit()
+    return True
+
+
+async def search_user_samples(
+    db: AsyncDbSession, user: User, search_term: str, skip: int = 0, limit: int = 50
+) -> list[LabSample]:
+    if limit > MAX_SEARCH_RESULTS:
+        limit = MAX_SEARCH_RESULTS
+    if search_term.isdigit():
+        samples = await db.scalars(
+            select(LabSample)
+            .filter(LabSample.id == int(search_term), LabSample.user_id == user.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return samples.all()
+
+    search_term = search_term.strip().lower()
+
+    samples = await db.scalars(
+        select(LabSample)
+        .filter(
+            LabSample.user_id == user.id,
+            matches(SAMPLE_SEARCH_TEXT, search_term),
+        )
+        .order_by(by_relevance(SAMPLE_SEARCH_TEXT, search_term), LabSample.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return samples.all()
+
+
+async def get_user_samples_by_family(
+    db: AsyncDbSession, user: User, family: str
+) -> list[LabSample]:
+    samples = await db.scalars(
+        select(LabSample).filter(
+            LabSample.user_id == user.id, LabSample.family == family
+        )
+    )
+    return samples.all()
+
+
+async def search_unique_lab_sample_families(
+    db: AsyncDbSession, user: User, search_term: str
+) -> list[str]:
+    search_term = search_term.strip().lower()
+    families = await db.execute(
+        select(LabSample.family)
+        .filter(
+            LabSample.user_id == user.id, LabSample.family.ilike(f"%{search_term}%")
+        )
+        .distinct()
+    )
+    return families.all()
@@ -0,0 +1,35 @@
+from sqlalchemy import or_, select
+
+from app.services.database import AsyncDbSession
+from app.services.models import SearchIndexEntry, User
+from app.services.search import MAX_SEARCH_RESULTS, by_relevance, matches
+
+
+async def search_user_entities(
+    db: AsyncDbSession, user: User, search_term: str, skip: int = 0, limit: int = 50
+) -> list[SearchIndexEntry]:
+    """Samples, experiments and measurements matching `search_term`, best
+    matches first, from the one trigram indexed search_index table."""
+    if limit > MAX_SEARCH_RESULTS:
+        limit = MAX_SEARCH_RESULTS
+
+    search_term = search_term.strip().lower()
+    condition = matches(SearchIndexEntry.text, search_term)
+    order = [
+        by_relevance(SearchIndexEntry.text, search_term),
+        SearchIndexEntry.entity_id.desc(),
+    ]
+    if search_term.isdigit():
+        # An id finds that entity of every type, ahead of text matches.
+        is_id = SearchIndexEntry.entity_id == int(search_term)
+        condition = or_(is_id, condition)
+        order.insert(0, is_id.desc())
+
+    entries = await db.scalars(
+        select(SearchIndexEntry)
+        .filter(SearchIndexEntry.user_id == user.id, condition)
+        .order_by(*order)
+        .offset(skip)
+        .limit(limit)
+    )
+    return entries.all()
@@ -1,94 +1,305 @@
-from datetime import UTC, datetime
+import hashlib
+import time
+from datetime import UTC, datetime, timedelta
 
-from fastapi import Depends, Request
+import jwt
+from fastapi import Depends, Request, Response
+from pydantic import ValidationError
+from sqlalchemy.orm import joinedload, make_transient_to_detached
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import HTTPConnection
 
-from app.config import COOKIE_KEY
-from app.services.crud.user import get_user_by_username, get_user_sessions
-from app.services.database import DbSession, get_db
-from app.services.models import User, UserSession
-from app.services.schemas import AuthTokenPayload
+from app.config import (
+    COOKIE_KEY,
+    MAX_COOKIE_AGE,
+    SESSION_MODE,
+    SESSION_RENEWAL_INTERVAL,
+    SIGNED_SESSION_MODE,
+)
+from app.services.cache import api_key_cache, session_cache
+from app.services.crud.user import get_user_sessions
+from app.services.database import DbSession, SessionLocal, get_db
+from app.services.models import RevokedSession, User, UserSession, utc_now
+from app.services.revocation import revocation_filter
+from app.services.schemas import AuthTokenPayload, SessionTokenPayload
 from app.services.security import (
+    decode_auth_token,
+    generate_api_key_id,
     generate_auth_token,
     generate_random_password,
-    hash_password_bcrypted,
-    verify_password,
-    verify_password_bcrypted,
+    generate_session_id,
+    hash_api_key,
+    verify_api_key,
 )
 
 
+_UNRESOLVED = object()
+
+
 def get_current_user(request: Request, db: DbSession = Depends(get_db)) -> User | None:
-    session_id = request.cookies.get(COOKIE_KEY)
-    if not session_id:
+    user = getattr(request.state, "user", _UNRESOLVED)
+    if user is _UNRESOLVED:
+        user = get_session_user(
+            db, request.cookies.get(COOKIE_KEY)
+        ) or get_api_key_user(db, get_request_api_key(request))
+    if user is None:
         return None
+    return db.merge(user, load=False)
+
+
+async def get_request_user(request: Request) -> User | None:
+    """get_current_user for routes on the async engine.
+
+    The user the AuthMiddleware resolved is returned detached, so no pool
+    connection is checked out for it. Only public endpoints, which the
+    middleware skips, look the user up here.
+    """
+    user = getattr(request.state, "user", _UNRESOLVED)
+    if user is _UNRESOLVED:
+        user = await run_in_threadpool(resolve_request_user, request)
+    return user
+
+
+def resolve_request_user(connection: HTTPConnection) -> User | None:
+    with SessionLocal() as db:
+        return get_session_user(
+            db, connection.cookies.get(COOKIE_KEY)
+        ) or get_api_key_user(db, get_request_api_key(connection))
+
 
+def get_session_user(db: DbSession, session_token: str | None) -> User | None:
+    if not session_token:
+        return None
+
+    if SESSION_MODE == SIGNED_SESSION_MODE:
+        return get_signed_session_user(session_token)
+
+    user = get_cached_session_user(session_token)
+    if user is not None:
+        return user
+
+    user, _ = load_session_user(db, session_token)
+    return user
+
+
+def get_cached_session_user(session_token: str) -> User | None:
+    cached = session_cache.get(session_token)
+    if cached is None:
+        return None
+
+    user, expires_at = cached
+    if expires_at <= datetime.now(tz=UTC):
+        session_cache.invalidate(session_token)
+        return None
+    return user
+
+
+def load_session_user(
+    db: DbSession, session_token: str, renew: bool = False
+) -> tuple[User | None, datetime | None]:
+    """Load the active user of an unexpired session, caching it for later
+    requests.
+
+    With `renew`, the session's expiry slides forward, but at most once per
+    SESSION_RENEWAL_INTERVAL. The new expiry is returned when that happens so
+    the caller can refresh the cookie.
+    """
+    now = utc_now()
     session = (
-        db.query(UserSession).filter(UserSession.session_token == session_id).first()
+        db.query(UserSession)
+        .options(joinedload(UserSession.user))
+        .filter(
+            UserSession.session_token == session_token,
+            UserSession.expires_at > now,
+        )
+        .first()
+    )
+    if session is None or session.user is None or not session.user.active:
+        return None, None
+
+    user = session.user
+    db.expunge(user)
+
+    expires_at = session.expires_at
+    renewed_expires_at = None
+    renew_after = expires_at - timedelta(
+        seconds=MAX_COOKIE_AGE - SESSION_RENEWAL_INTERVAL
+    )
+    if renew and now >= renew_after:
+        renewed_expires_at = now + timedelta(seconds=MAX_COOKIE_AGE)
+        db.query(UserSession).filter(UserSession.id == session.id).update(
+            {UserSession.expires_at: renewed_expires_at}, synchronize_session=False
+        )
+        db.commit()
+        expires_at = renewed_expires_at
+
+    session_cache.set(session_token, (user, as_utc(expires_at)), tag=user.id)
+    return user, renewed_expires_at
+
+
+def as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value
+
+
+def delete_expired_sessions(db: DbSession, batch_size: int) -> int:
+    deleted_count = 0
+    for model in (UserSession, RevokedSession):
+        while True:
+            now = utc_now()
+            expired_ids = (
+                db.query(model.id)
+                .filter(model.expires_at <= now)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            deleted = (
+                db.query(model)
+                .filter(model.id.in_(expired_ids))
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+            deleted_count += deleted
+            if deleted < batch_size:
+                break
+    return deleted_count
+
+
+def set_session_cookie(response: Response, session_token: str) -> None:
+    response.set_cookie(
+        key=COOKIE_KEY,
+        value=session_token,
+        secure=True,
+        httponly=True,
+        samesite="Lax",
+        max_age=MAX_COOKIE_AGE,
     )
-    if session is None:
+
+
+def get_signed_session_user(session_token: str) -> User | None:
+    try:
+        payload = decode_auth_token(session_token, SessionTokenPayload)
+    except (jwt.InvalidTokenError, ValidationError):
+        return None
+    if revocation_filter.is_revoked(payload):
         return None
-    return session.user
 
+    # Only the claims carried by the token are set; any other attribute is
+    # loaded lazily once the user is merged into a request session.
+    user = User(id=payload.user_id, username=payload.username, role=payload.role)
+    make_transient_to_detached(user)
+    return user
 
-def create_user_session(db: DbSession, user: User) -> UserSession:
-    sessions = get_user_sessions(db, user)
-    for session in sessions:
-        db.delete(session)
 
-    session = UserSession(
+def issue_signed_session_token(user: User) -> str:
+    issued_at = time.time()
+    payload = SessionTokenPayload(
         user_id=user.id,
+        username=user.username,
+        role=user.role,
+        session_id=generate_session_id(),
+        issued_at=issued_at,
+        exp=int(issued_at) + MAX_COOKIE_AGE,
     )
-    db.add(session)
-    db.commit()
-    db.refresh(session)
-    return session
+    return generate_auth_token(payload)
 
 
-def register_user_if_not_registered(db: DbSession, username: str, password: str):
-    user = User(
-        username=username,
-        hashed_password=hash_password_bcrypted(password),
-        created_at=datetime.now(tz=UTC),
-    )
-    try:
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-        return user
-    except Exception:
+def resolve_session_user(
+    session_token: str | None,
+) -> tuple[User | None, datetime | None]:
+    if not session_token:
+        return None, None
+    with SessionLocal() as db:
+        return load_session_user(db, session_token, renew=True)
+
+
+def get_request_api_key(connection: HTTPConnection) -> str | None:
+    scheme, _, api_key = connection.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not api_key.strip():
         return None
+    return api_key.strip()
+
+
+def api_key_cache_key(api_key: str) -> bytes:
+    return hashlib.sha256(api_key.encode("utf-8")).digest()
 
 
-def login_user(db: DbSession, username: str, password: str) -> UserSession | None:
-    user = get_user_by_username(db, username)
-    if not user or not user.active:
+def get_api_key_user(db: DbSession, api_key: str | None) -> User | None:
+    if not api_key:
         return None
 
-    if not verify_password_bcrypted(user.hashed_password, password):
-        if verify_password(user.hashed_password, password):
-            print("using argon2")
-            user.hashed_password = hash_password_bcrypted(password)
-            db.commit()
-            return create_user_session(db, user)
+    cache_key = api_key_cache_key(api_key)
+    user = api_key_cache.get(cache_key)
+    if user is not None:
+        return user
+
+    try:
+        payload = decode_auth_token(api_key)
+    except (jwt.InvalidTokenError, ValidationError):
+        return None
+
+    user = db.query(User).filter(User.api_key_id == payload.key_id).first()
+    if (
+        user is None
+        or user.id != payload.user_id
+        or not user.active
+        or not verify_api_key(user.hashed_api_key, payload.token)
+    ):
+        return None
+
+    db.expunge(user)
+    api_key_cache.set(cache_key, user, tag=user.id)
+    return user
+
+
+def resolve_api_key_user(api_key: str | None) -> User | None:
+    if not api_key:
         return None
+    with SessionLocal() as db:
+        return get_api_key_user(db, api_key)
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    session_cache.invalidate_tag(user_id)
+    api_key_cache.invalidate_tag(user_id)
 
-    return create_user_session(db, user)
+
+def revoke_user_sessions(db: DbSession, user_id: int) -> None:
+    invalidate_cached_user(user_id)
+    if SESSION_MODE != SIGNED_SESSION_MODE:
+        return
+
+    now = utc_now()
+    db.add(
+        RevokedSession(
+            user_id=user_id,
+            revoked_at=now,
+            expires_at=now + timedelta(seconds=MAX_COOKIE_AGE),
+        )
+    )
+    db.commit()
+    revocation_filter.add(user_id, None, now)
 
 
 def logout_user(db: DbSession, user: User) -> None:
-    sessions = get_user_sessions(db, user)
-    for session in sessions:
-        db.delete(session)
+    user_id = user.id
+    get_user_sessions(db, user).delete(synchronize_session=False)
     db.commit()
+    revoke_user_sessions(db, user_id)
 
 
 def create_user_api_key(db: DbSession, user: User) -> str:
     api_key = generate_random_password()
-    user.hashed_api_key = hash_password_bcrypted(api_key)
+    user.api_key_id = generate_api_key_id()
+    user.hashed_api_key = hash_api_key(api_key)
     db.commit()
+    invalidate_cached_user(user.id)
 
     payload = AuthTokenPayload(
         user_id=user.id,
         username=user.username,
         token=api_key,
+        key_id=user.api_key_id,
     )
     return generate_auth_token(payload)
@@ -1,6 +1,9 @@
 import os
+import time
+from threading import Lock
 
-from sqlalchemy import create_engine, pool
+from sqlalchemy import create_engine, event, pool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 
@@ -19,12 +22,133 @@ def construct_database_url():
     return f"postgresql://{user}:{password}@{host}/{database}"
 
 
+def construct_async_database_url(database_url: str) -> str:
+    _, _, location = database_url.partition("://")
+    return f"postgresql+asyncpg://{location}"
+
+
+class MeteredPool:
+    """Pool mixin recording pool activity for get_pool_statistics.
+
+    Checkouts, checkins and new connections are counted from the public pool
+    events. The wait is timed around Pool.connect, as no event fires before a
+    checkout starts.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = Lock()
+        self.checkout_count = 0
+        self.checkin_count = 0
+        self.connect_count = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        event.listen(self, "checkout", self._count_checkout)
+        event.listen(self, "checkin", self._count_checkin)
+        event.listen(self, "connect", self._count_connect)
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            waited = time.perf_counter() - start
+            with self._metrics_lock:
+                self.wait_time_total += waited
+                self.wait_time_max = max(self.wait_time_max, waited)
+
+    def _count_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._metrics_lock:
+            self.checkout_count += 1
+
+    def _count_checkin(self, dbapi_connection, connection_record):
+        with self._metrics_lock:
+            self.checkin_count += 1
+
+    def _count_connect(self, dbapi_connection, connection_record):
+        with self._metrics_lock:
+            self.connect_count += 1
+
+
+class MeteredQueuePool(MeteredPool, pool.QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(MeteredPool, pool.AsyncAdaptedQueuePool):
+    pass
+
+
+def get_engine_options() -> dict:
+    if DATABASE_POOL_MODE == "null":
+        return {"poolclass": pool.NullPool}
+
+    if DATABASE_POOL_MODE != "queue":
+        raise Exception(f"Unknown DATABASE_POOL_MODE {DATABASE_POOL_MODE!r}")
+
+    return {
+        "poolclass": MeteredQueuePool,
+        "pool_size": int(os.getenv("DATABASE_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DATABASE_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DATABASE_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DATABASE_POOL_PRE_PING", "true").lower()
+        in ("1", "true", "yes"),
+    }
+
+
+def get_async_engine_options() -> dict:
+    options = get_engine_options()
+    if options["poolclass"] is pool.NullPool:
+        return options
+    return {**options, "poolclass": MeteredAsyncQueuePool}
+
+
+def get_pool_statistics() -> dict:
+    return {
+        "mode": DATABASE_POOL_MODE,
+        "sync": get_engine_pool_statistics(engine.pool),
+        "async": get_engine_pool_statistics(async_engine.pool),
+    }
+
+
+def get_engine_pool_statistics(engine_pool: pool.Pool) -> dict | None:
+    if not isinstance(engine_pool, MeteredPool):
+        return None
+
+    checkout_count = engine_pool.checkout_count
+    return {
+        "size": engine_pool.size(),
+        "checked_in": engine_pool.checkedin(),
+        "checked_out": engine_pool.checkedout(),
+        "overflow": engine_pool.overflow(),
+        "checkouts": checkout_count,
+        "checkins": engine_pool.checkin_count,
+        "connects": engine_pool.connect_count,
+        "wait_time_total_ms": round(engine_pool.wait_time_total * 1000, 3),
+        "wait_time_mean_ms": round(
+            engine_pool.wait_time_total * 1000 / checkout_count
+            if checkout_count
+            else 0.0,
+            3,
+        ),
+        "wait_time_max_ms": round(engine_pool.wait_time_max * 1000, 3),
+    }
+
+
 DATABASE_URL = construct_database_url()
+DATABASE_POOL_MODE = os.getenv("DATABASE_POOL_MODE", "queue").lower()
 
-engine = create_engine(url=DATABASE_URL, poolclass=pool.NullPool)
+engine = create_engine(url=DATABASE_URL, **get_engine_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = create_async_engine(
+    url=construct_async_database_url(DATABASE_URL), **get_async_engine_options()
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 def get_db():
     db = SessionLocal()
@@ -34,4 +158,10 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 DbSession = Session
+AsyncDbSession = AsyncSession
@@ -0,0 +1,185 @@
+import polars as pl
+
+from app.services.codec import decode_measurement_data, encoded_column_names
+from app.services.pyramid import (
+    LEVEL,
+    argmax_column,
+    argmin_column,
+    max_column,
+    min_column,
+)
+
+_ROW = "__row"
+_BUCKET = "__bucket"
+
+
+def downsample_min_max(
+    data: pl.DataFrame, x: str, variables: list[str], points: int
+) -> pl.DataFrame:
+    """Reduce the series of `variables` against `x` to at most `points` rows.
+
+    Rows are split into equally sized buckets and only the rows holding the
+    minimum and maximum of each variable in a bucket are kept, together with
+    the first and last row. Peaks and troughs therefore survive, which plain
+    striding would drop. Rows stay in their original order.
+    """
+    columns = list(dict.fromkeys([x, *variables]))
+    series = data.select(columns).drop_nulls()
+    if series.height <= points:
+        return series
+
+    # Two of the rows are the first and last one.
+    buckets = (points - 2) // (2 * len(variables))
+    series = series.with_row_index(_ROW)
+    ends = pl.Series([0, series.height - 1], dtype=series[_ROW].dtype)
+    if not buckets:
+        return series.filter(pl.col(_ROW).is_in(ends)).drop(_ROW)
+    extremes = (
+        series.with_columns(
+            # The row index is UInt32, whose product with buckets overflows.
+            (pl.col(_ROW).cast(pl.Int64) * buckets // series.height).alias(_BUCKET)
+        )
+        .group_by(_BUCKET)
+        .agg(
+            *(
+                pl.col(_ROW).get(pl.col(variable).arg_min()).alias(f"{index}_min")
+                for index, variable in enumerate(variables)
+            ),
+            *(
+                pl.col(_ROW).get(pl.col(variable).arg_max()).alias(f"{index}_max")
+                for index, variable in enumerate(variables)
+            ),
+        )
+        .drop(_BUCKET)
+    )
+    rows = pl.concat([*extremes.get_columns(), ends])
+    return series.filter(pl.col(_ROW).is_in(rows)).drop(_ROW)
+
+
+def window_by_x(
+    data: pl.DataFrame,
+    x: str,
+    x_min: float | None,
+    x_max: float | None,
+    x_sorted: bool = False,
+) -> pl.DataFrame:
+    """Keep the rows whose `x` lies within [x_min, x_max].
+
+    Scans are normally recorded with a monotonically increasing x, in which
+    case the window is found by binary search and sliced without copying.
+    `x_sorted` says so, without nulls or NaN, as recorded in the statistics
+    at ingest; checking it here would cost a pass over the column. Other data
+    falls back to a filter.
+    """
+    if x_min is None and x_max is None:
+        return data
+    if not data.schema[x].is_numeric():
+        raise ValueError(f"{x} is not numeric")
+
+    if x_sorted:
+        # Searched as expressions: Series.search_sorted needs numpy for a
+        # Python scalar.
+        start = pl.lit(0) if x_min is None else pl.col(x).search_sorted(x_min, "left")
+        end = (
+            pl.lit(data.height)
+            if x_max is None
+            else pl.col(x).search_sorted(x_max, "right")
+        )
+        start, end = data.select(start.alias("start"), end.alias("end")).row(0)
+        return data.slice(start, max(end - start, 0))
+
+    bounds = []
+    if x_min is not None:
+        bounds.append(pl.col(x) >= x_min)
+    if x_max is not None:
+        bounds.append(pl.col(x) <= x_max)
+    return data.filter(*bounds)
+
+
+def read_pyramid_window(
+    payload: bytes | None,
+    pyramid: bytes | None,
+    x: str,
+    variables: list[str],
+    points: int,
+    x_min: float | None = None,
+    x_max: float | None = None,
+    x_sorted: bool = False,
+) -> pl.DataFrame | None:
+    """Serve the chart from the precomputed min/max pyramid, if it can.
+
+    The finest level whose buckets inside the window fit in `points` picks the
+    rows holding each variable's minimum and maximum per bucket, which are
+    then read from `payload`; if no level fits, those rows are downsampled to
+    `points`. None is returned when the raw data should be read instead: there
+    is no pyramid, a variable is not in it, the x buckets overlap (x is not
+    ordered) or level 0 already fits, in which case the raw rows give a finer
+    picture.
+    """
+    row_columns = [argmin_column(name) for name in variables] + [
+        argmax_column(name) for name in variables
+    ]
+    columns = [min_column(x), max_column(x), *row_columns]
+    if not set(columns).issubset(encoded_column_names(pyramid)):
+        return None
+
+    levels = decode_measurement_data(pyramid, columns=[LEVEL, *columns]).partition_by(
+        LEVEL, maintain_order=True, include_key=False
+    )
+
+    x_lower, x_upper = levels[0][min_column(x)], levels[0][max_column(x)]
+    if not (x_lower.slice(1) >= x_upper.slice(0, x_upper.len() - 1)).all():
+        return None
+
+    for index, level in enumerate(levels):
+        bounds = []
+        if x_min is not None:
+            bounds.append(pl.col(max_column(x)) >= x_min)
+        if x_max is not None:
+            bounds.append(pl.col(min_column(x)) <= x_max)
+        if bounds:
+            level = level.filter(*bounds)
+        if level.height * len(row_columns) <= points:
+            if index == 0:
+                return None
+            break
+
+    rows = (
+        pl.concat(level.select(row_columns).get_columns()).drop_nulls().unique().sort()
+    )
+    data = decode_measurement_data(
+        payload, columns=list(dict.fromkeys([x, *variables]))
+    )
+    window = window_by_x(data[rows], x, x_min, x_max, x_sorted)
+    return downsample_min_max(window, x, variables, points)
+
+
+def read_measurement_window(
+    payload: bytes | None,
+    pyramid: bytes | None,
+    x: str,
+    variables: list[str],
+    points: int | None,
+    x_min: float | None = None,
+    x_max: float | None = None,
+    x_sorted: bool = False,
+) -> pl.DataFrame:
+    """Rows of `x` and `variables` within [x_min, x_max].
+
+    They are downsampled to `points` unless it is None, which asks for every
+    row at full resolution.
+    """
+    if points is not None:
+        window = read_pyramid_window(
+            payload, pyramid, x, variables, points, x_min, x_max, x_sorted
+        )
+        if window is not None:
+            return window
+
+    data = decode_measurement_data(
+        payload, columns=list(dict.fromkeys([x, *variables]))
+    )
+    data = window_by_x(data, x, x_min, x_max, x_sorted)
+    if points is None:
+        return data
+    return downsample_min_max(data, x, variables, points)
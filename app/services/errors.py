@@ -5,3 +5,6 @@ class DuplicateVariableNameError(Exception): ...
 
 
 class DataPointNotInEveryVariableError(Exception): ...
+
+
+class PasswordHashingBusyError(Exception): ...
@@ -0,0 +1,104 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+from app.services.models import Experiment, LabSample, Measurement, User
+from app.services.resources import TEMPLATES_VERSION
+
+# Responses depend on the signed in user, on whether HTMX asked for a partial
+# and, for data, on the negotiated format, so shared caches must not reuse them.
+CACHE_CONTROL = "private, no-cache"
+VARY = "Accept, Cookie, Authorization, HX-Request"
+
+
+# Relationship collections are loaded without an ORDER BY, so their order can
+# change between reads of identical content.
+def by_id(entities: list) -> list:
+    return sorted(entities, key=lambda entity: entity.id)
+
+
+def entity_etag(request: Request, user: User, *versions: Any) -> str:
+    key = (
+        TEMPLATES_VERSION,
+        user.id,
+        bool(request.headers.get("HX-Request")),
+        *versions,
+    )
+    return f'"{hashlib.sha256(repr(key).encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": VARY}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
+
+
+def measurement_version(measurement: Measurement) -> tuple:
+    return (
+        "measurement",
+        measurement.id,
+        measurement.name,
+        measurement.created_at,
+        measurement.updated_at,
+        measurement.lab_sample_id,
+    )
+
+
+def sample_version(sample: LabSample) -> tuple:
+    return (
+        "sample",
+        sample.id,
+        sample.updated_at,
+        sample.is_archived,
+        sample.formula,
+        sample.label,
+        sample.format,
+        sample.family,
+    )
+
+
+def experiment_version(experiment: Experiment) -> tuple:
+    return (
+        "experiment",
+        experiment.id,
+        experiment.updated_at,
+        experiment.is_archived,
+        tuple(sample.id for sample in by_id(experiment.lab_samples)),
+        tuple((method.id, method.is_completed) for method in by_id(experiment.methods)),
+    )
+
+
+def sample_detail_version(sample: LabSample) -> tuple:
+    return (
+        sample_version(sample),
+        tuple(
+            measurement_version(measurement)
+            for measurement in by_id(sample.measurements)
+        ),
+        tuple(
+            experiment_version(experiment) for experiment in by_id(sample.experiments)
+        ),
+    )
+
+
+def experiment_detail_version(experiment: Experiment) -> tuple:
+    return (
+        experiment_version(experiment),
+        experiment.name,
+        experiment.description,
+        tuple(
+            (method.name, method.description) for method in by_id(experiment.methods)
+        ),
+        tuple(sample_version(sample) for sample in by_id(experiment.lab_samples)),
+    )
@@ -1,55 +1,107 @@
 import csv
-from io import StringIO
+from tempfile import NamedTemporaryFile
 
 import polars as pl
 from fastapi import UploadFile
-from pydantic import ValidationError
+from pydantic import TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
 
 from app.services import schemas
-from app.services.errors import CSVFieldError
+from app.services.codec import coerce_numeric_columns
+from app.services.errors import CSVFieldError, DuplicateVariableNameError
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
-async def parse_user_samples(contents) -> list[schemas.LabSample]:
-    csv_data = StringIO(contents.decode("utf-8"))
-    csv_reader = csv.DictReader(csv_data)
+LAB_SAMPLES_ADAPTER = TypeAdapter(list[schemas.LabSample])
 
-    return [parse_csv_sample_row(row) for row in csv_reader]
 
+async def parse_user_samples(
+    contents: bytes,
+) -> tuple[list[schemas.LabSample], int]:
+    """Valid samples of an uploaded sheet and the number of rejected rows."""
+    return await run_in_threadpool(read_user_samples_csv, contents)
 
-def parse_csv_sample_row(row) -> schemas.LabSample | None:
+
+def read_user_samples_csv(contents: bytes) -> tuple[list[schemas.LabSample], int]:
     try:
-        sample_data = schemas.LabSample(
-            formula=row.get("formula"),
-            label=row.get("label"),
-            format=row.get("format"),
-            family=row.get("family"),
+        df = pl.read_csv(contents, infer_schema_length=0)
+    except pl.exceptions.NoDataError:
+        return [], 0
+    except pl.exceptions.PolarsError:
+        raise CSVFieldError
+
+    # Empty cells are empty strings, as with csv.DictReader, while a missing
+    # column leaves the field unset so that every row fails validation.
+    fields = list(schemas.LabSample.model_fields)
+    if not set(fields) & set(df.columns):
+        return [], df.height
+
+    rows = df.select(
+        (
+            pl.col(field).fill_null("")
+            if field in df.columns
+            else pl.lit(None, dtype=pl.String).alias(field)
         )
-        return sample_data
-    except ValidationError:
-        return None
+        for field in fields
+    ).to_dicts()
+
+    try:
+        return LAB_SAMPLES_ADAPTER.validate_python(rows), 0
+    except ValidationError as error:
+        invalid_rows = {
+            details["loc"][0] for details in error.errors() if details["loc"]
+        }
+
+    valid_rows = [row for index, row in enumerate(rows) if index not in invalid_rows]
+    return LAB_SAMPLES_ADAPTER.validate_python(valid_rows), len(invalid_rows)
 
 
 async def parse_measurements(name: str, file: UploadFile) -> schemas.Measurements:
-    contents = await file.read()
-    await file.close()
+    # The upload is spooled to disk chunk by chunk so Polars can scan it from a
+    # path, rather than the whole file being held in memory several times over.
+    with NamedTemporaryFile(suffix=".csv") as upload:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            upload.write(chunk)
+        await file.close()
+        upload.flush()
 
-    csv_data = StringIO(contents.decode("utf-8"))
-    csv_reader = csv.DictReader(csv_data)
+        return await run_in_threadpool(read_measurements_csv, name, upload.name)
 
-    variables = [
-        validate_variable_name__and_unit(field) for field in csv_reader.fieldnames
-    ]
 
-    df = pl.DataFrame(csv_reader)
-    df = df.rename({col: col.split()[0] for col in df.columns})
+def read_measurements_csv(name: str, path: str) -> schemas.Measurements:
+    variables = read_csv_header_variables(path)
+    names = [variable.name for variable in variables]
+    if len(names) != len(set(names)):
+        raise DuplicateVariableNameError
+
+    # Every column is read as text, so a value late in the file that does not
+    # fit the type of the rows before it cannot fail the scan;
+    # coerce_numeric_columns then types the columns from all their values.
+    try:
+        df = pl.scan_csv(
+            path,
+            new_columns=names,
+            infer_schema_length=0,
+        ).collect(streaming=True)
+    except pl.exceptions.PolarsError:
+        raise CSVFieldError
 
     return schemas.Measurements(
         name=name,
         variables=variables,
-        data_points=df.to_dicts(),
+        data=coerce_numeric_columns(df),
     )
 
 
+def read_csv_header_variables(path: str) -> list[schemas.Variable]:
+    with open(path, newline="", encoding="utf-8-sig") as csv_file:
+        header = next(csv.reader(csv_file), None)
+    if not header:
+        raise CSVFieldError
+
+    return [validate_variable_name__and_unit(field) for field in header]
+
+
 def validate_variable_name__and_unit(field) -> schemas.Variable:
     field = field.strip().replace(")", "").replace("(", "")
     try:
@@ -1,43 +1,101 @@
-from typing import Callable
+from datetime import datetime
 
-from fastapi import Request
 from fastapi.responses import RedirectResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.config import PUBLIC_ENDPOINTS
-from app.services.crud.auth import get_current_user
-from app.services.database import get_db
-from app.services.models import UserRole
+from app.config import (
+    COOKIE_KEY,
+    PUBLIC_ENDPOINTS,
+    SESSION_MODE,
+    SIGNED_SESSION_MODE,
+)
+from app.services.cache import api_key_cache
+from app.services.crud.auth import (
+    api_key_cache_key,
+    get_cached_session_user,
+    get_request_api_key,
+    get_signed_session_user,
+    resolve_api_key_user,
+    resolve_session_user,
+    set_session_cookie,
+)
+from app.services.models import User, UserRole
 
+ADMIN_ENDPOINT = UserRole.ADMIN.name.lower()
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
+
+class AuthMiddleware:
+    def __init__(self, app: ASGIApp):
         self.app = app
-        super().__init__(app)
-
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: Callable,
-    ):
-        endpoint = request.url.path.split("/")[1]
-        db = next(get_db())
-        user = get_current_user(request, db)
-
-        if endpoint == UserRole.ADMIN.name.lower():
-            if user is not None and user.role == UserRole.ADMIN.name:
-                response = await call_next(request)
-                return response
-            return RedirectResponse(url="/login", status_code=303)
-
-        if endpoint not in PUBLIC_ENDPOINTS:
-            if user is not None:
-                response = await call_next(request)
-                return response
-            return RedirectResponse(url="/login", status_code=303)
-
-        response = await call_next(request)
-        return response
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = scope["path"].split("/")[1]
+        if endpoint in PUBLIC_ENDPOINTS:
+            await self.app(scope, receive, send)
+            return
+
+        connection = HTTPConnection(scope)
+        user, renewed_expires_at = await self.resolve_session_user(connection)
+        if user is None:
+            user = await self.resolve_api_key_user(connection)
+        connection.state.user = user
+
+        if user is None or (
+            endpoint == ADMIN_ENDPOINT and user.role != UserRole.ADMIN.name
+        ):
+            response = RedirectResponse(url="/login", status_code=303)
+            await response(scope, receive, send)
+            return
+
+        if renewed_expires_at is not None:
+            send = self.renew_session_cookie(send, connection.cookies[COOKIE_KEY])
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def resolve_session_user(
+        connection: HTTPConnection,
+    ) -> tuple[User | None, datetime | None]:
+        session_token = connection.cookies.get(COOKIE_KEY)
+        if not session_token:
+            return None, None
+        if SESSION_MODE == SIGNED_SESSION_MODE:
+            return get_signed_session_user(session_token), None
+        user = get_cached_session_user(session_token)
+        if user is not None:
+            return user, None
+        return await run_in_threadpool(resolve_session_user, session_token)
+
+    @staticmethod
+    def renew_session_cookie(send: Send, session_token: str) -> Send:
+        cookie_response = Response()
+        set_session_cookie(cookie_response, session_token)
+        cookie = cookie_response.headers["set-cookie"]
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("set-cookie", cookie)
+            await send(message)
+
+        return send_with_cookie
+
+    @staticmethod
+    async def resolve_api_key_user(connection: HTTPConnection) -> User | None:
+        api_key = get_request_api_key(connection)
+        if not api_key:
+            return None
+        user = api_key_cache.get(api_key_cache_key(api_key))
+        if user is None:
+            user = await run_in_threadpool(resolve_api_key_user, api_key)
+        return user
 
 
 # class CacheControlMiddleware(BaseHTTPMiddleware):
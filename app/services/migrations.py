@@ -0,0 +1,332 @@
+import json
+
+import polars as pl
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.services.codec import (
+    coerce_numeric_columns,
+    decode_measurement_data,
+    encode_measurement_data,
+)
+from app.services.pyramid import PYRAMID_MIN_ROWS, build_pyramid
+from app.services.statistics import summarise_variables
+
+# Arbitrary key for pg_advisory_xact_lock so that concurrently starting workers
+# apply the migrations one at a time.
+_MIGRATION_LOCK_ID = 7_340_211
+
+_DATA_POINTS_BATCH_SIZE = 100
+
+# Entity types are the trigger arguments and must match app/services/search.py.
+_SEARCH_INDEX_FUNCTION = """
+CREATE OR REPLACE FUNCTION sync_search_index() RETURNS trigger AS $$
+DECLARE
+    entry_title text;
+    entry_text text;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM search_index
+        WHERE entity_type = TG_ARGV[0] AND entity_id = OLD.id;
+        RETURN NULL;
+    END IF;
+
+    IF TG_TABLE_NAME = 'lab_samples' THEN
+        entry_title := NEW.label;
+        entry_text := coalesce(NEW.label, '') || ' ' || coalesce(NEW.family, '')
+            || ' ' || coalesce(NEW.format, '') || ' ' || coalesce(NEW.formula, '');
+    ELSIF TG_TABLE_NAME = 'experiments' THEN
+        entry_title := NEW.name;
+        entry_text := coalesce(NEW.name, '') || ' ' || coalesce(NEW.description, '');
+    ELSE
+        entry_title := NEW.name;
+        entry_text := coalesce(NEW.name, '');
+    END IF;
+
+    IF NEW.user_id IS NULL THEN
+        DELETE FROM search_index
+        WHERE entity_type = TG_ARGV[0] AND entity_id = NEW.id;
+        RETURN NULL;
+    END IF;
+    INSERT INTO search_index (entity_type, entity_id, user_id, title, text)
+    VALUES (TG_ARGV[0], NEW.id, NEW.user_id, entry_title, entry_text)
+    ON CONFLICT (entity_type, entity_id) DO UPDATE
+    SET user_id = EXCLUDED.user_id, title = EXCLUDED.title, text = EXCLUDED.text;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+_SEARCH_INDEX_BACKFILL = (
+    """
+    INSERT INTO search_index (entity_type, entity_id, user_id, title, text)
+    SELECT 'sample', id, user_id, label,
+        coalesce(label, '') || ' ' || coalesce(family, '')
+        || ' ' || coalesce(format, '') || ' ' || coalesce(formula, '')
+    FROM lab_samples WHERE user_id IS NOT NULL
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO search_index (entity_type, entity_id, user_id, title, text)
+    SELECT 'experiment', id, user_id, name,
+        coalesce(name, '') || ' ' || coalesce(description, '')
+    FROM experiments WHERE user_id IS NOT NULL
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO search_index (entity_type, entity_id, user_id, title, text)
+    SELECT 'measurement', id, user_id, name, coalesce(name, '')
+    FROM measurements WHERE user_id IS NOT NULL
+    ON CONFLICT DO NOTHING
+    """,
+)
+
+
+def convert_measurement_data_points(connection: Connection) -> None:
+    """Move measurements stored as JSON rows into the columnar `data` blob.
+
+    The legacy column is left in place, emptied, so that rolling back to an
+    older release does not fail on a missing column.
+    """
+    has_data_points = connection.execute(
+        text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'measurements' AND column_name = 'data_points'"
+        )
+    ).first()
+    if has_data_points is None:
+        return
+
+    while True:
+        rows = connection.execute(
+            text(
+                "SELECT id, data_points FROM measurements "
+                "WHERE data_points IS NOT NULL AND data IS NULL "
+                "ORDER BY id LIMIT :batch_size"
+            ),
+            {"batch_size": _DATA_POINTS_BATCH_SIZE},
+        ).all()
+        if not rows:
+            return
+
+        for measurement_id, data_points in rows:
+            data = coerce_numeric_columns(pl.DataFrame(data_points or []))
+            connection.execute(
+                text(
+                    "UPDATE measurements "
+                    "SET data = :data, row_count = :row_count, data_points = NULL "
+                    "WHERE id = :id"
+                ),
+                {
+                    "id": measurement_id,
+                    "data": encode_measurement_data(data),
+                    "row_count": data.height,
+                },
+            )
+
+
+def backfill_measurement_statistics(connection: Connection) -> None:
+    while True:
+        rows = connection.execute(
+            text(
+                "SELECT id, data FROM measurements "
+                "WHERE statistics IS NULL AND data IS NOT NULL "
+                "ORDER BY id LIMIT :batch_size"
+            ),
+            {"batch_size": _DATA_POINTS_BATCH_SIZE},
+        ).all()
+        if not rows:
+            return
+
+        for measurement_id, data in rows:
+            connection.execute(
+                text("UPDATE measurements SET statistics = :statistics WHERE id = :id"),
+                {
+                    "id": measurement_id,
+                    "statistics": json.dumps(
+                        summarise_variables(decode_measurement_data(data))
+                    ),
+                },
+            )
+
+
+def backfill_measurement_pyramids(connection: Connection) -> None:
+    """Build the pyramid of large measurements stored before it existed.
+
+    Measurements without a numeric variable get no pyramid and are read again
+    on every startup; they are rare enough not to need a marker.
+    """
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            text(
+                "SELECT id, data FROM measurements "
+                "WHERE pyramid IS NULL AND data IS NOT NULL "
+                "AND row_count >= :min_rows AND id > :last_id "
+                "ORDER BY id LIMIT :batch_size"
+            ),
+            {
+                "min_rows": PYRAMID_MIN_ROWS,
+                "last_id": last_id,
+                "batch_size": _DATA_POINTS_BATCH_SIZE,
+            },
+        ).all()
+        if not rows:
+            return
+
+        for measurement_id, data in rows:
+            last_id = measurement_id
+            pyramid = build_pyramid(decode_measurement_data(data))
+            if pyramid is None:
+                continue
+            connection.execute(
+                text("UPDATE measurements SET pyramid = :pyramid WHERE id = :id"),
+                {"id": measurement_id, "pyramid": encode_measurement_data(pyramid)},
+            )
+
+
+def backfill_search_index(connection: Connection) -> None:
+    """Index the entities created before the search index triggers existed.
+
+    Once the index holds a row the triggers are in place, so later startups
+    skip the scans.
+    """
+    if connection.execute(text("SELECT 1 FROM search_index LIMIT 1")).first():
+        return
+    for statement in _SEARCH_INDEX_BACKFILL:
+        connection.execute(text(statement))
+
+
+# Statements bringing databases created by older versions of the models up to
+# date. Base.metadata.create_all only creates missing tables, so every entry
+# here must be idempotent. Callables receive the open connection.
+MIGRATIONS = (
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS api_key_id VARCHAR(32)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_api_key_id ON users (api_key_id)",
+    "UPDATE users SET hashed_api_key = NULL "
+    "WHERE api_key_id IS NULL AND hashed_api_key IS NOT NULL",
+    "ALTER TABLE user_sessions ADD COLUMN IF NOT EXISTS created_at TIMESTAMP",
+    "ALTER TABLE user_sessions ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP",
+    "UPDATE user_sessions SET expires_at = timezone('utc', now()) + interval '1 hour' "
+    "WHERE expires_at IS NULL",
+    "CREATE INDEX IF NOT EXISTS ix_user_sessions_expires_at "
+    "ON user_sessions (expires_at)",
+    "ALTER TABLE measurements ADD COLUMN IF NOT EXISTS data BYTEA",
+    "ALTER TABLE measurements ADD COLUMN IF NOT EXISTS row_count INTEGER DEFAULT 0",
+    convert_measurement_data_points,
+    "ALTER TABLE measurements ADD COLUMN IF NOT EXISTS pyramid BYTEA",
+    backfill_measurement_pyramids,
+    "ALTER TABLE measurements ADD COLUMN IF NOT EXISTS statistics JSON",
+    backfill_measurement_statistics,
+    """
+    INSERT INTO measurement_variable_statistics (
+        measurement_id, user_id, name, unit,
+        min, max, mean, std, count, nan_count, sorted
+    )
+    SELECT
+        m.id, m.user_id, v ->> 'name', v ->> 'unit',
+        (s ->> 'min')::float8,
+        (s ->> 'max')::float8,
+        (s ->> 'mean')::float8,
+        (s ->> 'std')::float8,
+        (s ->> 'count')::integer,
+        (s ->> 'nan_count')::integer,
+        (s ->> 'sorted')::boolean
+    FROM measurements m
+    CROSS JOIN LATERAL json_array_elements(m.variables::json) v
+    CROSS JOIN LATERAL (SELECT m.statistics::json -> (v ->> 'name') AS s) stats
+    WHERE m.statistics IS NOT NULL
+    AND m.user_id IS NOT NULL
+    AND NOT EXISTS (
+        SELECT 1 FROM measurement_variable_statistics mvs
+        WHERE mvs.measurement_id = m.id
+    )
+    """,
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'measurements'
+            AND column_name = 'variables'
+            AND data_type = 'json'
+        ) THEN
+            ALTER TABLE measurements
+            ALTER COLUMN variables TYPE JSONB USING variables::jsonb;
+        END IF;
+    END
+    $$
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_measurements_variables "
+    "ON measurements USING gin (variables jsonb_path_ops)",
+    # Adds import_key and, only in that same step, keys the newest sample of
+    # every (label, family) so sheets uploaded before the upsert import existed
+    # are matched too. Samples created or renamed later stay unkeyed.
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'lab_samples'
+            AND column_name = 'import_key'
+        ) THEN
+            ALTER TABLE lab_samples ADD COLUMN import_key VARCHAR(101);
+            UPDATE lab_samples SET import_key = keyed.import_key
+            FROM (
+                SELECT DISTINCT ON (s.user_id, s.label, s.family)
+                    s.id, s.label || chr(31) || s.family AS import_key
+                FROM lab_samples s
+                WHERE s.label IS NOT NULL
+                AND s.family IS NOT NULL
+                ORDER BY s.user_id, s.label, s.family, s.id DESC
+            ) keyed
+            WHERE lab_samples.id = keyed.id;
+        END IF;
+    END
+    $$
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_lab_samples_user_import_key "
+    "ON lab_samples (user_id, import_key)",
+    # Trigram indexes serve the '%term%' searches; each expression must match
+    # the one built in app/services/search.py.
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS ix_lab_samples_search_trgm ON lab_samples
+    USING gin ((
+        coalesce(label, '') || ' ' || coalesce(family, '') || ' '
+        || coalesce(format, '') || ' ' || coalesce(formula, '')
+    ) gin_trgm_ops)
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_lab_samples_family_trgm "
+    "ON lab_samples USING gin (family gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_experiments_search_trgm "
+    "ON experiments USING gin ((coalesce(name, '')) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_measurements_search_trgm "
+    "ON measurements USING gin ((coalesce(name, '')) gin_trgm_ops)",
+    _SEARCH_INDEX_FUNCTION,
+    "CREATE OR REPLACE TRIGGER lab_samples_search_index "
+    "AFTER INSERT OR DELETE OR UPDATE OF label, family, format, formula, user_id "
+    "ON lab_samples FOR EACH ROW EXECUTE FUNCTION sync_search_index('sample')",
+    "CREATE OR REPLACE TRIGGER experiments_search_index "
+    "AFTER INSERT OR DELETE OR UPDATE OF name, description, user_id "
+    "ON experiments FOR EACH ROW EXECUTE FUNCTION sync_search_index('experiment')",
+    "CREATE OR REPLACE TRIGGER measurements_search_index "
+    "AFTER INSERT OR DELETE OR UPDATE OF name, user_id "
+    "ON measurements FOR EACH ROW EXECUTE FUNCTION sync_search_index('measurement')",
+    backfill_search_index,
+    "CREATE INDEX IF NOT EXISTS ix_search_index_text_trgm "
+    "ON search_index USING gin (text gin_trgm_ops)",
+)
+
+
+def run_migrations(engine: Engine) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock(:lock_id)"),
+            {"lock_id": _MIGRATION_LOCK_ID},
+        )
+        for migration in MIGRATIONS:
+            if callable(migration):
+                migration(connection)
+            else:
+                connection.execute(text(migration))
@@ -1,4 +1,5 @@
 import secrets
+from datetime import UTC, datetime, timedelta
 from enum import Enum
 
 from sqlalchemy import (
@@ -6,15 +7,31 @@ from sqlalchemy import (
     Boolean,
     Column,
     DateTime,
+    Float,
     ForeignKey,
+    Index,
     Integer,
+    LargeBinary,
     String,
     Table,
+    Text,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.hybrid import hybrid_method
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
+from app.config import MAX_COOKIE_AGE
 from app.services.database import Base, engine
+from app.services.migrations import run_migrations
+
+
+def utc_now() -> datetime:
+    """The current UTC time, naive, as the DateTime columns store it.
+
+    asyncpg refuses aware values for columns without a time zone, where
+    psycopg2 would convert them silently.
+    """
+    return datetime.now(tz=UTC).replace(tzinfo=None)
 
 
 class SubscriptionLevel(Enum):
@@ -43,22 +60,44 @@ class UserSession(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     user = relationship("User", backref="user_sessions")
     session_token = Column(String(255), unique=True, nullable=False)
+    created_at = Column(DateTime)
+    expires_at = Column(DateTime, index=True)
 
     def __init__(self, user_id: int):
+        now = utc_now()
         self.session_token = self.generate_session_token()
         self.user_id = user_id
+        self.created_at = now
+        self.expires_at = now + timedelta(seconds=MAX_COOKIE_AGE)
 
     @staticmethod
     def generate_session_token():
         return secrets.token_hex(64)
 
 
+class RevokedSession(Base):
+    """Revocation of signed session tokens.
+
+    A row without a session_id revokes every token issued to the user before
+    revoked_at. Rows are only relevant until expires_at, after which every
+    token they cover has expired on its own.
+    """
+
+    __tablename__ = "revoked_sessions"
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    session_id = Column(String(64), nullable=True)
+    revoked_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True, autoincrement=True, unique=True)
     username = Column(String, index=True, unique=True)
     hashed_password = Column(String(200))
     hashed_api_key = Column(String(200))
+    api_key_id = Column(String(32), unique=True, index=True, nullable=True)
     active = Column(Boolean, default=True)
     role = Column(String(50), default=UserRole.RESEARCHER.name, nullable=False)
     samples = relationship("LabSample", backref="users")
@@ -79,6 +118,9 @@ experiment_samples = Table(
 
 class LabSample(Base):
     __tablename__ = "lab_samples"
+    __table_args__ = (
+        Index("ix_lab_samples_user_import_key", "user_id", "import_key", unique=True),
+    )
     id = Column(
         Integer,
         primary_key=True,
@@ -91,6 +133,10 @@ class LabSample(Base):
     label = Column(String(50))
     format = Column(String(50))
     family = Column(String(50))
+    # Natural key (label and family) matching re-imported sheet rows to the
+    # sample they created. Samples stored any other way are keyed by the first
+    # upsert import that names them.
+    import_key = Column(String(101), nullable=True)
     created_at = Column(DateTime)
     updated_at = Column(DateTime, nullable=True)
     is_archived = Column(Boolean, default=False)
@@ -129,14 +175,78 @@ class Experiment(Base):
 
 class Measurement(Base):
     __tablename__ = "measurements"
+    __table_args__ = (
+        Index(
+            "ix_measurements_variables",
+            "variables",
+            postgresql_using="gin",
+            postgresql_ops={"variables": "jsonb_path_ops"},
+        ),
+    )
     id = Column(Integer, primary_key=True, index=True, autoincrement=True, unique=True)
     name = Column(String(50))
-    variables = Column(JSON)
-    data_points = Column(JSON)
+    variables = Column(JSONB)
+    # The encoded data can run to hundreds of MB, so it is only loaded when
+    # asked for explicitly (see crud get_user_measurement_payload).
+    data = deferred(Column(LargeBinary), group="payload")
+    row_count = Column(Integer, default=0)
+    statistics = Column(JSON, nullable=True)
+    pyramid = deferred(Column(LargeBinary, nullable=True), group="payload")
     created_at = Column(DateTime)
     updated_at = Column(DateTime, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     lab_sample_id = Column(Integer, ForeignKey("lab_samples.id"))
+    variable_statistics = relationship(
+        "MeasurementVariableStatistics",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+class MeasurementVariableStatistics(Base):
+    """One row per measurement variable holding its summary statistics.
+
+    Mirrors Measurement.statistics in indexable columns so measurements can
+    be searched by properties of their data without reading it.
+    """
+
+    __tablename__ = "measurement_variable_statistics"
+    __table_args__ = (
+        Index(
+            "ix_measurement_variable_statistics_user_name_max",
+            "user_id",
+            "name",
+            "max",
+        ),
+        Index(
+            "ix_measurement_variable_statistics_user_name_min",
+            "user_id",
+            "name",
+            "min",
+        ),
+        Index(
+            "ix_measurement_variable_statistics_user_unit",
+            "user_id",
+            "unit",
+        ),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    measurement_id = Column(
+        Integer,
+        ForeignKey("measurements.id", ondelete="CASCADE"),
+        index=True,
+        nullable=False,
+    )
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    name = Column(String(50))
+    unit = Column(String(50))
+    min = Column(Float, nullable=True)
+    max = Column(Float, nullable=True)
+    mean = Column(Float, nullable=True)
+    std = Column(Float, nullable=True)
+    count = Column(Integer)
+    nan_count = Column(Integer)
+    sorted = Column(Boolean, nullable=True)
 
 
 class Method(Base):
@@ -160,6 +270,23 @@ class ContactResponse(Base):
     created_at = Column(DateTime)
 
 
+class SearchIndexEntry(Base):
+    """Searchable text of one sample, experiment or measurement.
+
+    Rows are written by the sync_search_index trigger on the entity tables
+    (see migrations.py), never by the application, so that one trigram
+    indexed query finds every kind of entity a user owns.
+    """
+
+    __tablename__ = "search_index"
+    entity_type = Column(String(20), primary_key=True)
+    entity_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    title = Column(String(50))
+    text = Column(Text, nullable=False)
+
+
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 ModelBase = Base
@@ -0,0 +1,90 @@
+import polars as pl
+
+PYRAMID_MIN_ROWS = 100_000
+PYRAMID_BASE_BUCKET_SIZE = 256
+PYRAMID_LEVEL_FACTOR = 4
+PYRAMID_MIN_BUCKETS = 500
+
+LEVEL = "level"
+_ROW = "__row"
+
+
+def min_column(name: str) -> str:
+    return f"{name}.min"
+
+
+def max_column(name: str) -> str:
+    return f"{name}.max"
+
+
+def argmin_column(name: str) -> str:
+    return f"{name}.argmin"
+
+
+def argmax_column(name: str) -> str:
+    return f"{name}.argmax"
+
+
+def build_pyramid(data: pl.DataFrame) -> pl.DataFrame | None:
+    """Min/max envelope of every numeric variable at decreasing resolutions.
+
+    Next to its minimum and maximum, each bucket holds the numbers of the rows
+    they were taken from, so that readers can serve the actual rows. Level 0
+    summarises PYRAMID_BASE_BUCKET_SIZE consecutive rows per bucket
+    and each further level merges PYRAMID_LEVEL_FACTOR buckets of the one
+    below, until a level has at most PYRAMID_MIN_BUCKETS buckets. All levels
+    are returned in one frame, told apart by the `level` column.
+    """
+    numeric = [name for name, dtype in data.schema.items() if dtype.is_numeric()]
+    if data.height < PYRAMID_MIN_ROWS or not numeric:
+        return None
+
+    level = summarise_buckets(
+        data.select(numeric),
+        PYRAMID_BASE_BUCKET_SIZE,
+        [pl.col(name).min().alias(min_column(name)) for name in numeric]
+        + [pl.col(name).max().alias(max_column(name)) for name in numeric]
+        + [
+            pl.col(_ROW).get(pl.col(name).arg_min()).alias(argmin_column(name))
+            for name in numeric
+        ]
+        + [
+            pl.col(_ROW).get(pl.col(name).arg_max()).alias(argmax_column(name))
+            for name in numeric
+        ],
+    )
+    levels = [level]
+    while level.height > PYRAMID_MIN_BUCKETS:
+        level = summarise_buckets(
+            level,
+            PYRAMID_LEVEL_FACTOR,
+            [pl.col(min_column(name)).min() for name in numeric]
+            + [pl.col(max_column(name)).max() for name in numeric]
+            + [
+                pl.col(argmin_column(name)).get(pl.col(min_column(name)).arg_min())
+                for name in numeric
+            ]
+            + [
+                pl.col(argmax_column(name)).get(pl.col(max_column(name)).arg_max())
+                for name in numeric
+            ],
+        )
+        levels.append(level)
+
+    return pl.concat(
+        [
+            level.with_columns(pl.lit(index, dtype=pl.UInt8).alias(LEVEL))
+            for index, level in enumerate(levels)
+        ]
+    )
+
+
+def summarise_buckets(
+    data: pl.DataFrame, bucket_size: int, aggregations: list[pl.Expr]
+) -> pl.DataFrame:
+    return (
+        data.with_row_index(_ROW)
+        .group_by(pl.col(_ROW) // bucket_size, maintain_order=True)
+        .agg(aggregations)
+        .drop(_ROW)
+    )
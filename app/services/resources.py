@@ -1,4 +1,6 @@
+import hashlib
 import os
+from pathlib import Path
 
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -6,3 +8,15 @@ from fastapi.templating import Jinja2Templates
 CURRENT_DIRECTORY = os.getcwd()
 templates = Jinja2Templates(directory=os.path.join(CURRENT_DIRECTORY, "templates"))
 static_files = StaticFiles(directory=os.path.join(CURRENT_DIRECTORY, "static"))
+
+
+def templates_version(directory: str) -> str:
+    """Changes whenever a template file does, so rendered pages can be
+    revalidated across deployments."""
+    digest = hashlib.sha256()
+    for path in sorted(Path(directory).rglob("*.html")):
+        digest.update(f"{path}:{path.stat().st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+TEMPLATES_VERSION = templates_version(os.path.join(CURRENT_DIRECTORY, "templates"))
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime
+from threading import Lock
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import REVOCATION_REFRESH_INTERVAL
+from app.services.database import SessionLocal
+from app.services.models import RevokedSession, utc_now
+from app.services.schemas import SessionTokenPayload
+
+logger = logging.getLogger(__name__)
+
+
+def _timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value.timestamp()
+
+
+class SessionRevocationFilter:
+    """In-memory view of the unexpired rows of the revoked_sessions table.
+
+    Lookups never touch the database. The view is rebuilt every
+    `refresh_interval` seconds so revocations made by other workers are picked
+    up, while revocations made by this worker apply immediately.
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._session_ids: frozenset[str] = frozenset()
+        self._revoked_before: dict[int, float] = {}
+        self._local_revocations: list[tuple[float, int, str | None, float]] = []
+        self._lock = Lock()
+
+    def is_revoked(self, payload: SessionTokenPayload) -> bool:
+        if payload.session_id in self._session_ids:
+            return True
+        return payload.issued_at <= self._revoked_before.get(payload.user_id, 0.0)
+
+    def add(self, user_id: int, session_id: str | None, revoked_at: datetime) -> None:
+        with self._lock:
+            self._local_revocations.append(
+                (time.monotonic(), user_id, session_id, _timestamp(revoked_at))
+            )
+            self._apply(user_id, session_id, _timestamp(revoked_at))
+
+    def refresh(self) -> None:
+        started = time.monotonic()
+        with SessionLocal() as db:
+            revocations = (
+                db.query(
+                    RevokedSession.user_id,
+                    RevokedSession.session_id,
+                    RevokedSession.revoked_at,
+                )
+                .filter(RevokedSession.expires_at > utc_now())
+                .all()
+            )
+
+        session_ids = set()
+        revoked_before: dict[int, float] = {}
+        for user_id, session_id, revoked_at in revocations:
+            if session_id is not None:
+                session_ids.add(session_id)
+            else:
+                revoked_before[user_id] = max(
+                    revoked_before.get(user_id, 0.0), _timestamp(revoked_at)
+                )
+
+        with self._lock:
+            self._session_ids = frozenset(session_ids)
+            self._revoked_before = revoked_before
+            # Revocations committed while the query ran may be missing from it.
+            self._local_revocations = [
+                revocation
+                for revocation in self._local_revocations
+                if revocation[0] >= started
+            ]
+            for _, user_id, session_id, revoked_at in self._local_revocations:
+                self._apply(user_id, session_id, revoked_at)
+
+    async def refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await run_in_threadpool(self.refresh)
+            except Exception:
+                logger.exception("Could not refresh the session revocation filter")
+
+    def _apply(self, user_id: int, session_id: str | None, revoked_at: float) -> None:
+        if session_id is not None:
+            self._session_ids = self._session_ids | {session_id}
+        else:
+            self._revoked_before = {
+                **self._revoked_before,
+                user_id: max(self._revoked_before.get(user_id, 0.0), revoked_at),
+            }
+
+
+revocation_filter = SessionRevocationFilter(REVOCATION_REFRESH_INTERVAL)
@@ -1,6 +1,5 @@
-from typing import Any
-
-from pydantic import BaseModel, EmailStr, model_validator
+import polars as pl
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, model_validator
 
 from app.services.errors import (
     DataPointNotInEveryVariableError,
@@ -9,10 +8,10 @@ from app.services.errors import (
 
 
 class LabSample(BaseModel):
-    formula: str
-    label: str
-    format: str
-    family: str
+    formula: str = Field(max_length=50)
+    label: str = Field(max_length=50)
+    format: str = Field(max_length=50)
+    family: str = Field(max_length=50)
 
 
 class Experiment(BaseModel):
@@ -26,9 +25,11 @@ class Variable(BaseModel):
 
 
 class Measurements(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     name: str
     variables: list[Variable]
-    data_points: list[dict[str, Any]]
+    data: pl.DataFrame
 
     @model_validator(mode="after")
     def validate_data_contains_variables(self):
@@ -36,8 +37,26 @@ class Measurements(BaseModel):
         if len(names) != len(set(names)):
             raise DuplicateVariableNameError
 
-        if set(self.data_points[0].keys()) != set(names):
+        if set(self.data.columns) != set(names):
             raise DataPointNotInEveryVariableError
+        return self
+
+
+class MeasurementQuery(BaseModel):
+    """Filters on the statistics of a single measurement variable.
+
+    `covers_from`/`covers_to` match variables whose range spans the interval.
+    """
+
+    variable: str | None = None
+    unit: str | None = None
+    min_gte: float | None = None
+    min_lte: float | None = None
+    max_gte: float | None = None
+    max_lte: float | None = None
+    covers_from: float | None = None
+    covers_to: float | None = None
+    limit: int = Field(50, ge=1, le=100)
 
 
 class ContactForm(BaseModel):
@@ -50,3 +69,13 @@ class AuthTokenPayload(BaseModel):
     user_id: int
     username: str
     token: str
+    key_id: str
+
+
+class SessionTokenPayload(BaseModel):
+    user_id: int
+    username: str
+    role: str
+    session_id: str
+    issued_at: float
+    exp: int
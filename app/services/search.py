@@ -0,0 +1,45 @@
+from sqlalchemy import ColumnElement, UnaryExpression, func, literal_column
+
+from app.services.models import Experiment, LabSample, Measurement
+
+MAX_SEARCH_RESULTS = 100
+
+# search_index.entity_type of each entity, as passed by the triggers that
+# maintain the index (see migrations.py).
+SAMPLE_ENTITY = "sample"
+EXPERIMENT_ENTITY = "experiment"
+MEASUREMENT_ENTITY = "measurement"
+ENTITY_PATHS = {
+    SAMPLE_ENTITY: "samples",
+    EXPERIMENT_ENTITY: "experiments",
+    MEASUREMENT_ENTITY: "measurements",
+}
+
+# Inlined rather than bound, so that the expressions below render exactly as
+# the trigram indexes in migrations.py were declared, prepared or not.
+_EMPTY = literal_column("''")
+_SPACE = literal_column("' '")
+
+
+def searchable_text(*columns) -> ColumnElement[str]:
+    text = func.coalesce(columns[0], _EMPTY)
+    for column in columns[1:]:
+        text = text + _SPACE + func.coalesce(column, _EMPTY)
+    return text
+
+
+SAMPLE_SEARCH_TEXT = searchable_text(
+    LabSample.label, LabSample.family, LabSample.format, LabSample.formula
+)
+EXPERIMENT_SEARCH_TEXT = searchable_text(Experiment.name)
+MEASUREMENT_SEARCH_TEXT = searchable_text(Measurement.name)
+
+
+def matches(text: ColumnElement[str], search_term: str) -> ColumnElement[bool]:
+    """Substring match that a gin_trgm_ops index on `text` can serve."""
+    return text.ilike(f"%{search_term}%")
+
+
+def by_relevance(text: ColumnElement[str], search_term: str) -> UnaryExpression:
+    """Best matching words first, e.g. "cu" ranks "Cu" above "CuSO4"."""
+    return func.word_similarity(search_term, text).desc()
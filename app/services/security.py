@@ -1,17 +1,54 @@
+import asyncio
+import hashlib
+import hmac
 import os
 import secrets
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+from typing import Any, Callable, TypeVar
 
 import bcrypt
 import jwt
 from argon2 import PasswordHasher
 from argon2.exceptions import InvalidHashError, VerifyMismatchError
+from pydantic import BaseModel
 
+from app.services.errors import PasswordHashingBusyError
 from app.services.schemas import AuthTokenPayload
 
+TokenPayload = TypeVar("TokenPayload", bound=BaseModel)
+
 _PASSWORD_LENGTH = 20
+_PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", "4"))
+_PASSWORD_HASHING_QUEUE_DEPTH = int(os.getenv("PASSWORD_HASHING_QUEUE_DEPTH", "32"))
 _JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 if not _JWT_SECRET_KEY:
     raise Exception("JWT_SECRET_KEY environment variable is not set")
+_API_KEY_SECRET = os.getenv("API_KEY_SECRET", _JWT_SECRET_KEY).encode("utf-8")
+
+
+# bcrypt and argon2 release the GIL while hashing, so a small dedicated thread
+# pool runs them in parallel without occupying the shared request threadpool.
+_password_executor = ThreadPoolExecutor(
+    max_workers=_PASSWORD_HASHING_WORKERS, thread_name_prefix="password-hashing"
+)
+_password_slots = BoundedSemaphore(
+    _PASSWORD_HASHING_WORKERS + _PASSWORD_HASHING_QUEUE_DEPTH
+)
+
+
+async def run_password_task(func: Callable[..., Any], *args) -> Any:
+    if not _password_slots.acquire(blocking=False):
+        raise PasswordHashingBusyError
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_slots.release()
+
+
+def shutdown_password_executor() -> None:
+    _password_executor.shutdown(wait=False, cancel_futures=True)
 
 
 def hash_password(password: str):
@@ -48,10 +85,32 @@ def generate_random_password():
     return secrets.token_urlsafe(_PASSWORD_LENGTH)
 
 
-def generate_auth_token(payload: AuthTokenPayload) -> str:
+def generate_api_key_id() -> str:
+    return secrets.token_hex(8)
+
+
+def hash_api_key(api_key: str) -> str:
+    return hmac.new(
+        _API_KEY_SECRET, api_key.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+
+def verify_api_key(hashed_api_key: str | None, api_key: str) -> bool:
+    if not hashed_api_key:
+        return False
+    return hmac.compare_digest(hash_api_key(api_key), hashed_api_key)
+
+
+def generate_session_id() -> str:
+    return secrets.token_hex(16)
+
+
+def generate_auth_token(payload: BaseModel) -> str:
     return jwt.encode(payload.model_dump(), _JWT_SECRET_KEY, algorithm="HS256")
 
 
-def decode_auth_token(token: str) -> AuthTokenPayload:
+def decode_auth_token(
+    token: str, schema: type[TokenPayload] = AuthTokenPayload
+) -> TokenPayload:
     payload = jwt.decode(token, _JWT_SECRET_KEY, algorithms=["HS256"])
-    return AuthTokenPayload(**payload)
+    return schema(**payload)
@@ -0,0 +1,49 @@
+import math
+
+import polars as pl
+
+_SEPARATOR = "\x1f"
+
+
+def summarise_variables(data: pl.DataFrame) -> dict[str, dict]:
+    """Summary statistics of every column, computed in a single select.
+
+    NaN and empty cells both count towards `nan_count` and are left out of
+    the other figures. Infinite results, and the NaN that infinities turn
+    the mean or std into, become None, since JSON has no value for them.
+    `sorted` means non-decreasing. Text columns only get `count` and
+    `nan_count`.
+    """
+    expressions = []
+    for name, dtype in data.schema.items():
+        column = pl.col(name)
+        missing = column.is_null()
+        if dtype.is_float():
+            missing = missing | column.is_nan()
+            column = column.fill_nan(None)
+
+        expressions += [
+            column.count().alias(f"{name}{_SEPARATOR}count"),
+            missing.sum().alias(f"{name}{_SEPARATOR}nan_count"),
+        ]
+        if dtype.is_numeric():
+            expressions += [
+                column.min().cast(pl.Float64).alias(f"{name}{_SEPARATOR}min"),
+                column.max().cast(pl.Float64).alias(f"{name}{_SEPARATOR}max"),
+                column.mean().alias(f"{name}{_SEPARATOR}mean"),
+                column.std().alias(f"{name}{_SEPARATOR}std"),
+                (column.drop_nulls().diff() >= 0)
+                .all()
+                .alias(f"{name}{_SEPARATOR}sorted"),
+            ]
+
+    if not expressions:
+        return {}
+
+    statistics: dict[str, dict] = {name: {} for name in data.columns}
+    for key, value in data.select(expressions).row(0, named=True).items():
+        name, statistic = key.rsplit(_SEPARATOR, 1)
+        if isinstance(value, float) and not math.isfinite(value):
+            value = None
+        statistics[name][statistic] = value
+    return statistics
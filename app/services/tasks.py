@@ -1,43 +1,102 @@
-import csv
+import asyncio
+import logging
 import os
 from datetime import UTC, datetime
+from functools import lru_cache
+from pathlib import Path
 
-from app.config import ADMIN_USERNAME
-from app.routes.samples import create_user_sample
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+
+from app.config import ADMIN_USERNAME, SESSION_SWEEP_BATCH_SIZE, SESSION_SWEEP_INTERVAL
 from app.services import schemas
-from app.services.crud.experiments import (
-    create_user_experiment,
-)
+from app.services.crud.auth import delete_expired_sessions
 from app.services.crud.user import get_user_by_username
-from app.services.database import DbSession, SessionLocal
-from app.services.models import User, UserRole
+from app.services.database import SessionLocal
+from app.services.file_handler import read_user_samples_csv
+from app.services.models import (
+    Experiment,
+    LabSample,
+    User,
+    UserRole,
+    experiment_samples,
+    utc_now,
+)
 from app.services.security import hash_password
 
+logger = logging.getLogger(__name__)
+
+DEMO_SAMPLES_PATH = Path("static/csv/samples.csv")
+DEMO_EXPERIMENT_NAME = "My First Experiment"
+DEMO_EXPERIMENT_DESCRIPTION = (
+    "This is a demo experiment, have a look at the attached samples"
+)
+
+
+@lru_cache(maxsize=1)
+def get_demo_samples() -> tuple[schemas.LabSample, ...]:
+    samples, _ = read_user_samples_csv(DEMO_SAMPLES_PATH.read_bytes())
+    return tuple(samples)
+
 
-def populate_demo_data_on_registration(db: DbSession, user: User):
-    experiment = create_user_experiment(
-        db,
-        user,
-        "My First Experiment",
-        "This is a demo experiment, have a look at the attached samples",
-    )
-
-    with open("static/csv/samples.csv") as csv_file:
-        csv_reader = csv.reader(csv_file)
-        next(csv_reader)
-        for row in csv_reader:
-            try:
-                sample = create_user_sample(
-                    db,
-                    user,
-                    schemas.LabSample(
-                        formula=row[0], format=row[1], label=row[2], family=row[3]
-                    ),
+def populate_demo_data_on_registration(user_id: int) -> None:
+    """Give a new account the demo experiment and its samples.
+
+    Runs after the response in its own session, with one INSERT for the
+    experiment, one for all samples and one for the links.
+    """
+    now = utc_now()
+    try:
+        with SessionLocal() as db:
+            experiment_id = db.execute(
+                insert(Experiment)
+                .values(
+                    user_id=user_id,
+                    name=DEMO_EXPERIMENT_NAME,
+                    description=DEMO_EXPERIMENT_DESCRIPTION,
+                    created_at=now,
+                    updated_at=now,
                 )
-                experiment.lab_samples.append(sample)
-            except Exception:
-                continue
-        db.commit()
+                .returning(Experiment.id)
+            ).scalar_one()
+
+            sample_ids = db.scalars(
+                insert(LabSample).returning(LabSample.id),
+                [
+                    {
+                        "user_id": user_id,
+                        "created_at": now,
+                        "updated_at": now,
+                        **sample.model_dump(),
+                    }
+                    for sample in get_demo_samples()
+                ],
+            ).all()
+
+            db.execute(
+                insert(experiment_samples),
+                [
+                    {"experiment_id": experiment_id, "lab_sample_id": sample_id}
+                    for sample_id in sample_ids
+                ],
+            )
+            db.commit()
+    except Exception:
+        logger.exception("Could not add demo data for user %s", user_id)
+
+
+def sweep_expired_sessions() -> int:
+    with SessionLocal() as db:
+        return delete_expired_sessions(db, SESSION_SWEEP_BATCH_SIZE)
+
+
+async def sweep_expired_sessions_periodically() -> None:
+    while True:
+        try:
+            await run_in_threadpool(sweep_expired_sessions)
+        except Exception:
+            logger.exception("Could not delete expired sessions")
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL)
 
 
 def create_admin_user() -> None:
@@ -0,0 +1,100 @@
+import json
+import struct
+import sys
+from array import array
+from io import BytesIO
+
+import msgpack
+import orjson
+import polars as pl
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+FLOAT64_MEDIA_TYPE = "application/vnd.labmate.float64"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MEDIA_TYPES = (
+    JSON_MEDIA_TYPE,
+    ARROW_STREAM_MEDIA_TYPE,
+    FLOAT64_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+)
+
+FLOAT64_MAGIC = b"LMF1"
+
+
+def negotiate_media_type(accept: str | None) -> str:
+    """The preferred supported media type of an Accept header, JSON otherwise."""
+    media_ranges = []
+    for position, media_range in enumerate((accept or "").split(",")):
+        media_type, *parameters = [part.strip() for part in media_range.split(";")]
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_ranges.append((-quality, position, media_type.lower()))
+
+    for negative_quality, _, media_type in sorted(media_ranges):
+        if negative_quality >= 0:
+            break
+        if media_type in MEDIA_TYPES:
+            return media_type
+        if media_type in ("*/*", "application/*"):
+            return JSON_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def encode_json(frame: pl.DataFrame, metadata: dict) -> bytes:
+    """The JSON envelope with the rows under `data_points`.
+
+    Polars writes the rows natively and orjson the small metadata object, so
+    no per-value Python objects are created on the way out.
+    """
+    envelope = orjson.dumps(metadata)
+    rows = frame.write_json().encode("utf-8")
+    return envelope[:-1] + b',"data_points":' + rows + b"}"
+
+
+def encode_arrow_stream(frame: pl.DataFrame) -> bytes:
+    buffer = BytesIO()
+    frame.write_ipc_stream(buffer, compression="uncompressed")
+    return buffer.getvalue()
+
+
+def encode_msgpack(frame: pl.DataFrame, metadata: dict) -> bytes:
+    return msgpack.packb(
+        {
+            **metadata,
+            "rows": frame.height,
+            "columns": {name: frame[name].to_list() for name in frame.columns},
+        }
+    )
+
+
+def encode_float64_columns(frame: pl.DataFrame, metadata: dict) -> bytes:
+    """Columns as little-endian float64 arrays behind a small JSON header.
+
+    Layout: the magic bytes, the header length as a little-endian uint32, the
+    UTF-8 JSON header (the metadata plus `rows` and `columns`), zero padding
+    to a multiple of 8, then each column in `columns` order. The alignment
+    lets browsers wrap every column in a Float64Array without copying.
+    Missing and non-numeric values are sent as NaN.
+    """
+    columns = frame.columns
+    frame = frame.select(
+        pl.all().cast(pl.Float64, strict=False).fill_null(float("nan"))
+    )
+    header = json.dumps({**metadata, "rows": frame.height, "columns": columns})
+    header = header.encode("utf-8")
+
+    buffer = bytearray(FLOAT64_MAGIC + struct.pack("<I", len(header)) + header)
+    buffer += bytes(-len(buffer) % 8)
+    for name in columns:
+        values = array("d", frame[name].to_list())
+        if sys.byteorder == "big":
+            values.byteswap()
+        buffer += values.tobytes()
+    return bytes(buffer)
@@ -0,0 +1,123 @@
+"""Requests/sec of the pure ASGI AuthMiddleware against the previous
+BaseHTTPMiddleware implementation.
+
+The ASGI app is driven in-process so that only middleware overhead is
+measured. The session cache is warmed so no database round trips happen.
+
+Run from the repository root with the usual environment variables set:
+
+    PYTHONPATH=. python scripts/benchmarks/auth_middleware.py
+"""
+
+import asyncio
+import time
+from datetime import UTC, datetime
+from typing import Callable
+
+from fastapi import Request
+from fastapi.responses import RedirectResponse
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.config import COOKIE_KEY, PUBLIC_ENDPOINTS
+from app.services.cache import session_cache
+from app.services.crud.auth import get_cached_session_user
+from app.services.middleware import AuthMiddleware
+from app.services.models import User, UserRole
+
+REQUESTS = 20_000
+SESSION_TOKEN = "benchmark-session-token"
+
+
+class BaseHTTPAuthMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable):
+        endpoint = request.url.path.split("/")[1]
+        user = await run_in_threadpool(
+            get_cached_session_user, request.cookies.get(COOKIE_KEY)
+        )
+        request.state.user = user
+
+        if endpoint == UserRole.ADMIN.name.lower():
+            if user is not None and user.role == UserRole.ADMIN.name:
+                return await call_next(request)
+            return RedirectResponse(url="/login", status_code=303)
+
+        if endpoint not in PUBLIC_ENDPOINTS:
+            if user is not None:
+                return await call_next(request)
+            return RedirectResponse(url="/login", status_code=303)
+
+        return await call_next(request)
+
+
+async def plain(request):
+    return PlainTextResponse("ok")
+
+
+async def stream(request):
+    async def chunks():
+        for _ in range(16):
+            yield b"x" * 1024
+
+    return StreamingResponse(chunks())
+
+
+def build_app(middleware_class) -> Starlette:
+    return Starlette(
+        routes=[
+            Route("/static/file.css", plain),
+            Route("/samples/", plain),
+            Route("/measurements/stream", stream),
+        ],
+        middleware=[Middleware(middleware_class)],
+    )
+
+
+async def requests_per_second(app: Starlette, path: str) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"cookie", f"{COOKIE_KEY}={SESSION_TOKEN}".encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await app(dict(scope), receive, send)
+    return REQUESTS / (time.perf_counter() - start)
+
+
+async def main():
+    user = User(id=0, username="benchmark", role=UserRole.RESEARCHER.name)
+    session_cache.set(SESSION_TOKEN, (user, datetime.max.replace(tzinfo=UTC)), tag=0)
+    apps = {
+        "BaseHTTPMiddleware": build_app(BaseHTTPAuthMiddleware),
+        "pure ASGI": build_app(AuthMiddleware),
+    }
+    print(f"{'path':<24}{'middleware':<22}{'req/s':>10}")
+    for path in ("/static/file.css", "/samples/", "/measurements/stream"):
+        for name, app in apps.items():
+            rate = await requests_per_second(app, path)
+            print(f"{path:<24}{name:<22}{rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+"""Throughput of a running LabMate server under concurrent clients.
+
+Start the server (e.g. scripts/dev_run.sh), log in and copy the session
+cookie, then run the benchmark once on the commit before the async
+database layer and once after it:
+
+    PYTHONPATH=. python scripts/benchmarks/concurrency.py \
+        --url http://127.0.0.1:8000 --session <labmate_session cookie>
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.config import COOKIE_KEY
+
+PATHS = ("/samples/", "/experiments/", "/measurements/")
+
+
+async def client_worker(
+    client: httpx.AsyncClient, deadline: float, latencies: list[float]
+) -> int:
+    completed = 0
+    while time.perf_counter() < deadline:
+        path = PATHS[completed % len(PATHS)]
+        start = time.perf_counter()
+        response = await client.get(path, headers={"HX-Request": "true"})
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        completed += 1
+    return completed
+
+
+async def run(url: str, session: str, clients: int, duration: float) -> None:
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(
+        base_url=url,
+        cookies={COOKIE_KEY: session},
+        limits=limits,
+        timeout=60,
+    ) as client:
+        latencies: list[float] = []
+        deadline = time.perf_counter() + duration
+        completed = await asyncio.gather(
+            *(client_worker(client, deadline, latencies) for _ in range(clients))
+        )
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+    print(
+        f"{clients:>8} {sum(completed) / duration:>10.1f} "
+        f"{statistics.median(latencies) * 1000:>10.1f} {p95 * 1000:>10.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--session", required=True)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200])
+    args = parser.parse_args()
+
+    print(f"{'clients':>8} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for clients in args.clients:
+        asyncio.run(run(args.url, args.session, clients, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Serialisation time of the measurement data JSON against payload size.
+
+Compares what FastAPI does for a returned dict (jsonable_encoder followed by
+json.dumps), orjson over the same list of dicts, and `encode_json`, which
+lets Polars write the rows and orjson only the metadata envelope.
+
+    PYTHONPATH=. python scripts/benchmarks/json_serialisation.py --sizes 1000 100000
+"""
+
+import argparse
+import json
+import math
+import time
+
+import orjson
+import polars as pl
+from fastapi.encoders import jsonable_encoder
+
+from app.services.wire import encode_json
+
+METADATA = {
+    "id": 1,
+    "name": "benchmark",
+    "variables": [
+        {"name": "2-Theta", "unit": "degree"},
+        {"name": "Intensity", "unit": "a.u."},
+    ],
+    "x": "2-Theta",
+    "y": "Intensity",
+}
+
+
+def synthetic_frame(rows: int) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "2-Theta": [10 + row * 0.0001 for row in range(rows)],
+            "Intensity": [abs(math.sin(row / 50)) * 50_000 for row in range(rows)],
+        }
+    )
+
+
+def fastapi_default(frame: pl.DataFrame) -> bytes:
+    content = jsonable_encoder({**METADATA, "data_points": frame.to_dicts()})
+    return json.dumps(content, separators=(",", ":")).encode("utf-8")
+
+
+def orjson_dicts(frame: pl.DataFrame) -> bytes:
+    return orjson.dumps({**METADATA, "data_points": frame.to_dicts()})
+
+
+def polars_passthrough(frame: pl.DataFrame) -> bytes:
+    return encode_json(frame, METADATA)
+
+
+def best_of(serialise, frame: pl.DataFrame, repeats: int) -> tuple[float, int]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        content = serialise(frame)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(content)
+
+
+def main(sizes: list[int], repeats: int) -> None:
+    print(f"{'rows':>10}{'serialiser':>22}{'MiB':>10}{'ms':>12}")
+    for rows in sizes:
+        frame = synthetic_frame(rows)
+        for serialise in (fastapi_default, orjson_dicts, polars_passthrough):
+            elapsed, size = best_of(serialise, frame, repeats)
+            print(
+                f"{rows:>10}{serialise.__name__:>22}"
+                f"{size / 1024 / 1024:>10.2f}{elapsed * 1000:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    main(args.sizes, args.repeats)
@@ -0,0 +1,75 @@
+"""Password verification throughput and event loop responsiveness during a
+login burst.
+
+Compares verifying bcrypt hashes inline on the event loop with running them
+through the bounded password hashing pool. While the burst is processed a
+ticker coroutine records how late the event loop wakes it up, which is what
+unrelated page loads experience.
+
+    PYTHONPATH=. python scripts/benchmarks/login_throughput.py --logins 64
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.services.errors import PasswordHashingBusyError
+from app.services.security import (
+    hash_password_bcrypted,
+    run_password_task,
+    verify_password_bcrypted,
+)
+
+PASSWORD = "correct horse battery staple"
+TICK = 0.01
+
+
+async def ticker(stop: asyncio.Event, lags: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def inline_login(hashed_password: str) -> bool:
+    return verify_password_bcrypted(hashed_password, PASSWORD)
+
+
+async def pooled_login(hashed_password: str) -> bool:
+    try:
+        return await run_password_task(
+            verify_password_bcrypted, hashed_password, PASSWORD
+        )
+    except PasswordHashingBusyError:
+        return False
+
+
+async def burst(login, hashed_password: str, logins: int) -> None:
+    stop = asyncio.Event()
+    lags: list[float] = []
+    ticker_task = asyncio.create_task(ticker(stop, lags))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login(hashed_password) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await ticker_task
+    print(
+        f"{login.__name__:<14}{logins / elapsed:>12.1f}"
+        f"{results.count(False):>10}{max(lags, default=0.0) * 1000:>16.1f}"
+    )
+
+
+async def main(logins: int) -> None:
+    hashed_password = hash_password_bcrypted(PASSWORD)
+    print(f"{'mode':<14}{'logins/s':>12}{'rejected':>10}{'max loop lag ms':>16}")
+    await burst(inline_login, hashed_password, logins)
+    await burst(pooled_login, hashed_password, logins)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins))
@@ -0,0 +1,96 @@
+"""Wall time and peak memory of parsing a measurement CSV upload.
+
+Compares the previous DictReader based parser, which decoded the whole upload
+and kept every value as a string, with the streaming Polars ingest in
+`parse_measurements`. Each run happens in a fresh process so the reported
+peak resident set size belongs to that parser alone.
+
+    PYTHONPATH=. python scripts/benchmarks/measurement_ingest.py --rows 1000000
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import random
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+
+import polars as pl
+from fastapi import UploadFile
+
+from app.services.file_handler import (
+    parse_measurements,
+    validate_variable_name__and_unit,
+)
+
+HEADER = ["2-Theta (degree)", "Intensity (a.u.)", "Background (a.u.)"]
+
+
+def write_synthetic_csv(path: str, rows: int) -> None:
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(HEADER)
+        for row in range(rows):
+            writer.writerow(
+                (
+                    f"{10 + row * 0.0001:.4f}",
+                    f"{random.uniform(0, 50_000):.3f}",
+                    f"{random.uniform(0, 500):.3f}",
+                )
+            )
+
+
+async def dict_reader_parse(path: str) -> int:
+    with open(path, "rb") as upload:
+        contents = upload.read()
+
+    csv_reader = csv.DictReader(StringIO(contents.decode("utf-8")))
+    [validate_variable_name__and_unit(field) for field in csv_reader.fieldnames]
+    df = pl.DataFrame(csv_reader)
+    df = df.rename({col: col.split()[0] for col in df.columns})
+    return len(df.to_dicts())
+
+
+async def streaming_parse(path: str) -> int:
+    with open(path, "rb") as upload:
+        measurements = await parse_measurements(
+            "benchmark", UploadFile(file=upload, filename="benchmark.csv")
+        )
+    return measurements.data.height
+
+
+def run(parser_name: str, path: str) -> tuple[int, float, float]:
+    parser = {"DictReader": dict_reader_parse, "streaming": streaming_parse}[
+        parser_name
+    ]
+    start = time.perf_counter()
+    rows = asyncio.run(parser(path))
+    elapsed = time.perf_counter() - start
+    peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return rows, elapsed, peak_mib
+
+
+def main(rows: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "measurements.csv")
+        write_synthetic_csv(path, rows)
+        size_mib = os.path.getsize(path) / 1024 / 1024
+        print(f"{rows} rows, {size_mib:.1f} MiB")
+        print(f"{'parser':<14}{'rows':>10}{'seconds':>10}{'peak RSS MiB':>14}")
+        for parser_name in ("DictReader", "streaming"):
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                parsed, elapsed, peak_mib = executor.submit(
+                    run, parser_name, path
+                ).result()
+            print(f"{parser_name:<14}{parsed:>10}{elapsed:>10.2f}{peak_mib:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    main(args.rows)
@@ -1,16 +1,41 @@
-async function getMeasurementData(endpoint) {
-    console.log("Received endpoint:", endpoint);
+const CHART_POINTS = 2000;
+const FLOAT64_MEDIA_TYPE = 'application/vnd.labmate.float64';
+
+async function fetchMeasurementData(endpoint, params) {
     const protocol = window.location.protocol;
     const host = window.location.host;
-    const url = `${protocol}//${host}/${endpoint}`;
-    console.log("Constructed URL:", url);
+    const url = new URL(`${protocol}//${host}/${endpoint}`);
+    Object.entries({ ...params, points: CHART_POINTS }).forEach(([key, value]) => {
+        url.searchParams.set(key, value);
+    });
+    const response = await fetch(url, { headers: { Accept: FLOAT64_MEDIA_TYPE } });
+    if (!response.ok) {
+        const errorDetails = await response.text();
+        throw new Error(`Network response was not ok: ${response.status} - ${errorDetails}`);
+    }
+    return decodeFloat64Columns(await response.arrayBuffer());
+}
+
+// Header length, JSON header padded to 8 bytes, then one float64 array per
+// column (see app/services/wire.py).
+function decodeFloat64Columns(buffer) {
+    const view = new DataView(buffer);
+    const headerLength = view.getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+
+    let offset = Math.ceil((8 + headerLength) / 8) * 8;
+    const columns = {};
+    header.columns.forEach(name => {
+        columns[name] = new Float64Array(buffer, offset, header.rows);
+        offset += header.rows * Float64Array.BYTES_PER_ELEMENT;
+    });
+    return { ...header, columns };
+}
+
+async function getMeasurementData(endpoint) {
+    measurementEndpoint = endpoint;
     try {
-        const response = await fetch(url);
-        if (!response.ok) {
-            const errorDetails = await response.text();
-            throw new Error(`Network response was not ok: ${response.status} - ${errorDetails}`);
-        }
-        measurementData = await response.json();
+        measurementData = await fetchMeasurementData(endpoint, {});
         updateDropdowns();
         initialisePlot();
         updateChart();
@@ -19,6 +44,37 @@ async function getMeasurementData(endpoint) {
     }
 }
 
+async function onAxisChange() {
+    const x = document.getElementById('xAxis').value;
+    const y = document.getElementById('yAxis').value;
+    if (!x || !y) {
+        return;
+    }
+
+    const params = { x, y };
+    const xMin = document.getElementById('xMin').value;
+    const xMax = document.getElementById('xMax').value;
+    if (xMin !== '') {
+        params.x_min = xMin;
+    }
+    if (xMax !== '') {
+        params.x_max = xMax;
+    }
+
+    try {
+        measurementData = await fetchMeasurementData(measurementEndpoint, params);
+        updateChart();
+    } catch (error) {
+        console.error('There was a problem with the fetch operation:', error);
+    }
+}
+
+function resetXRange() {
+    document.getElementById('xMin').value = '';
+    document.getElementById('xMax').value = '';
+    onAxisChange();
+}
+
 function updateDropdowns() {
     const xDropdown = document.getElementById('xAxis');
     const yDropdown = document.getElementById('yAxis');
@@ -38,21 +94,25 @@ function updateDropdowns() {
         yDropdown.appendChild(optionY);
     });
 
-    xDropdown.addEventListener('change', updateChart);
-    yDropdown.addEventListener('change', updateChart);
+    xDropdown.value = measurementData.x;
+    yDropdown.value = measurementData.y;
+
+    xDropdown.addEventListener('change', onAxisChange);
+    yDropdown.addEventListener('change', onAxisChange);
 }
 
 function updateChart() {
     const xAxisValue = document.getElementById('xAxis').value;
     const yAxisValue = document.getElementById('yAxis').value;
 
-    if (xAxisValue && yAxisValue) {
-        transformedData = measurementData.data_points.map(dataPoint => {
-            return {
-                x: dataPoint[xAxisValue],
-                y: dataPoint[yAxisValue]
-            };
-        });
+    const xValues = measurementData.columns[xAxisValue];
+    const yValues = measurementData.columns[yAxisValue];
+
+    if (xValues && yValues) {
+        transformedData = new Array(measurementData.rows);
+        for (let i = 0; i < measurementData.rows; i++) {
+            transformedData[i] = { x: xValues[i], y: yValues[i] };
+        }
 
         currentChart.data.datasets[0].data = transformedData;
         currentChart.data.datasets[0].label = `${xAxisValue} vs ${yAxisValue}`;
@@ -81,6 +141,7 @@ function initialisePlot() {
         },
         options: {
             responsive: true,
+            parsing: false,
             scales: {
                 x: {
                     type: 'linear',
@@ -0,0 +1,49 @@
+import time
+
+from app.services.cache import TTLCache
+
+
+def test_ttl_cache_evicts_the_least_recently_used_entry():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=2, ttl=0.01)
+    cache.set("a", 1)
+
+    time.sleep(0.02)
+
+    assert cache.get("a", "missing") == "missing"
+    assert len(cache) == 0
+
+
+def test_ttl_cache_invalidates_every_entry_of_a_tag():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("session-1", "alice", tag=1)
+    cache.set("session-2", "alice", tag=1)
+    cache.set("session-3", "bob", tag=2)
+
+    cache.invalidate_tag(1)
+
+    assert cache.get("session-1") is None
+    assert cache.get("session-2") is None
+    assert cache.get("session-3") == "bob"
+
+
+def test_ttl_cache_forgets_the_tag_of_a_replaced_entry():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("session", "alice", tag=1)
+    cache.set("session", "bob", tag=2)
+
+    cache.invalidate_tag(1)
+
+    assert cache.get("session") == "bob"
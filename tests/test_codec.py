@@ -0,0 +1,56 @@
+import polars as pl
+
+from app.services import schemas
+from app.services.codec import (
+    coerce_numeric_columns,
+    decode_measurement_data,
+    encode_measurement_data,
+    encoded_column_names,
+    measurement_columns,
+)
+from app.services.pyramid import PYRAMID_MIN_ROWS
+
+
+def test_measurement_data_round_trips_through_the_encoding():
+    data = pl.DataFrame({"t": [0.0, 0.5, 1.0], "label": ["a", None, "c"]})
+
+    payload = encode_measurement_data(data)
+
+    assert decode_measurement_data(payload).equals(data)
+    assert decode_measurement_data(payload, columns=["t"]).columns == ["t"]
+    assert encoded_column_names(payload) == ["t", "label"]
+
+
+def test_decode_measurement_data_of_nothing_is_empty():
+    assert decode_measurement_data(None).is_empty()
+    assert encoded_column_names(None) == []
+
+
+def test_coerce_numeric_columns_only_casts_fully_numeric_text():
+    data = pl.DataFrame(
+        {"t": [" 1", "2.5", None], "state": ["1", "on", "2"], "n": [1, 2, 3]}
+    )
+
+    coerced = coerce_numeric_columns(data)
+
+    assert coerced.schema == {"t": pl.Float64, "state": pl.String, "n": pl.Int64}
+    assert coerced["t"].to_list() == [1.0, 2.5, None]
+
+
+def test_measurement_columns_build_a_pyramid_for_large_data_only():
+    variables = [schemas.Variable(name="t", unit="s")]
+    small = pl.DataFrame({"t": [0.0, 1.0]})
+    large = pl.DataFrame({"t": pl.arange(0, PYRAMID_MIN_ROWS, eager=True)})
+
+    small_columns = measurement_columns(
+        schemas.Measurements(name="small", variables=variables, data=small)
+    )
+    large_columns = measurement_columns(
+        schemas.Measurements(name="large", variables=variables, data=large)
+    )
+
+    assert small_columns["row_count"] == 2
+    assert small_columns["pyramid"] is None
+    assert small_columns["variables"] == [{"name": "t", "unit": "s"}]
+    assert decode_measurement_data(small_columns["data"]).equals(small)
+    assert large_columns["pyramid"] is not None
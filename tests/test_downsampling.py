@@ -0,0 +1,102 @@
+import polars as pl
+
+from app.services.codec import encode_measurement_data
+from app.services.downsampling import (
+    downsample_min_max,
+    read_measurement_window,
+    read_pyramid_window,
+    window_by_x,
+)
+from app.services.pyramid import build_pyramid
+
+
+def scan(rows: int) -> pl.DataFrame:
+    x = pl.int_range(0, rows, eager=True).cast(pl.Float64)
+    return pl.DataFrame({"x": x, "y": (x * 7919) % 1000})
+
+
+def test_downsample_min_max_keeps_about_points_rows_of_large_series():
+    data = scan(1_200_000)
+
+    downsampled = downsample_min_max(data, "x", ["y"], 20_000)
+
+    assert 19_000 <= downsampled.height <= 20_002
+    assert downsampled["x"].is_sorted()
+    assert downsampled["x"][0] == 0
+    assert downsampled["x"][-1] == data.height - 1
+
+
+def test_downsample_min_max_keeps_peaks():
+    data = scan(100_000).with_columns(
+        pl.when(pl.col("x") == 54_321).then(10_000.0).otherwise(pl.col("y")).alias("y")
+    )
+
+    downsampled = downsample_min_max(data, "x", ["y"], 500)
+
+    assert downsampled["y"].max() == 10_000.0
+
+
+def test_downsample_min_max_never_exceeds_points():
+    data = scan(10_000)
+
+    assert downsample_min_max(data, "x", ["y"], 2)["x"].to_list() == [0.0, 9_999.0]
+    assert downsample_min_max(data, "x", ["y"], 5).height <= 5
+    assert downsample_min_max(data, "x", ["y"], 1_000).height <= 1_000
+
+
+def encode_with_pyramid(data: pl.DataFrame) -> tuple[bytes, bytes]:
+    return encode_measurement_data(data), encode_measurement_data(build_pyramid(data))
+
+
+def test_read_pyramid_window_downsamples_the_coarsest_level_to_points():
+    payload, pyramid = encode_with_pyramid(scan(1_200_000))
+
+    window = read_pyramid_window(payload, pyramid, "x", ["y"], 10)
+
+    assert 0 < window.height <= 10
+    assert window["x"].is_sorted()
+
+
+def test_read_pyramid_window_serves_actual_rows():
+    data = scan(400_000).with_columns(z=pl.col("x").sin())
+    payload, pyramid = encode_with_pyramid(data)
+
+    window = read_pyramid_window(payload, pyramid, "x", ["y", "z"], 2_000)
+
+    assert window is not None
+    assert 0 < window.height <= 2_000
+    assert (
+        window.join(data, on="x")
+        .filter((pl.col("y") != pl.col("y_right")) | (pl.col("z") != pl.col("z_right")))
+        .is_empty()
+    )
+    assert window.height == window.join(data, on="x").height
+
+
+def test_read_measurement_window_without_points_returns_every_row():
+    data = scan(200_000)
+    payload, pyramid = encode_with_pyramid(data)
+
+    window = read_measurement_window(payload, pyramid, "x", ["y"], None)
+    windowed = read_measurement_window(payload, pyramid, "x", ["y"], None, 10.0, 19.0)
+
+    assert window.equals(data)
+    assert windowed["x"].to_list() == [float(x) for x in range(10, 20)]
+
+
+def test_window_by_x_slices_sorted_x():
+    data = scan(1_000)
+
+    window = window_by_x(data, "x", 10.5, 20.0, x_sorted=True)
+
+    assert window["x"].to_list() == [float(x) for x in range(11, 21)]
+    assert window_by_x(data, "x", None, 2.0, x_sorted=True).height == 3
+    assert window_by_x(data, "x", 998.0, None, x_sorted=True).height == 2
+
+
+def test_window_by_x_filters_unsorted_x():
+    data = scan(1_000).reverse()
+
+    window = window_by_x(data, "x", 10.5, 20.0)
+
+    assert window["x"].to_list() == [float(x) for x in range(20, 10, -1)]
@@ -0,0 +1,28 @@
+from pathlib import Path
+
+import polars as pl
+
+from app.services.file_handler import read_measurements_csv
+
+
+def write_csv(path: Path, rows: list[str]) -> str:
+    path.write_text("\n".join(["time (s),signal (V)", *rows]) + "\n")
+    return str(path)
+
+
+def test_read_measurements_csv_accepts_a_late_float_in_an_integer_column(tmp_path):
+    rows = [f"{index},{index}" for index in range(20_000)] + ["20000,1.5"]
+
+    measurements = read_measurements_csv("scan", write_csv(tmp_path / "a.csv", rows))
+
+    assert measurements.data.schema["signal"] == pl.Float64
+    assert measurements.data["signal"][-1] == 1.5
+
+
+def test_read_measurements_csv_keeps_a_column_with_late_text(tmp_path):
+    rows = [f"{index},{index}.5" for index in range(20_000)] + ["20000,n/a"]
+
+    measurements = read_measurements_csv("scan", write_csv(tmp_path / "b.csv", rows))
+
+    assert measurements.data.schema["time"] == pl.Float64
+    assert measurements.data["signal"][-1] == "n/a"
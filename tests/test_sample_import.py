@@ -0,0 +1,48 @@
+import asyncio
+import os
+import secrets
+
+import pytest
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("needs a Postgres DATABASE_URL", allow_module_level=True)
+
+from sqlalchemy import delete, func, select
+
+from app.services import schemas
+from app.services.crud.aio.samples import create_user_samples, upsert_user_samples
+from app.services.database import AsyncSessionLocal
+from app.services.models import LabSample, User, utc_now
+
+SHEET = [
+    schemas.LabSample(formula="Si", label="A1", format="wafer", family="batch-1"),
+    schemas.LabSample(formula="GaAs", label="A2", format="wafer", family="batch-1"),
+    schemas.LabSample(formula="InP", label="A3", format="film", family="batch-1"),
+]
+
+
+async def import_append_then_upsert() -> tuple[tuple[int, int, int, int], int]:
+    async with AsyncSessionLocal() as db:
+        user = User(username=f"import-{secrets.token_hex(8)}", created_at=utc_now())
+        db.add(user)
+        await db.commit()
+        try:
+            await create_user_samples(db, user, SHEET)
+            counts = await upsert_user_samples(db, user, SHEET)
+            samples = await db.scalar(
+                select(func.count())
+                .select_from(LabSample)
+                .filter(LabSample.user_id == user.id)
+            )
+        finally:
+            await db.execute(delete(LabSample).filter(LabSample.user_id == user.id))
+            await db.delete(user)
+            await db.commit()
+    return counts, samples
+
+
+def test_upsert_matches_samples_appended_before():
+    counts, samples = asyncio.run(import_append_then_upsert())
+
+    assert counts == (0, 0, 3, 0)
+    assert samples == 3
@@ -0,0 +1,39 @@
+import math
+
+import polars as pl
+
+from app.services.statistics import summarise_variables
+
+
+def test_summarise_variables_of_a_numeric_column():
+    data = pl.DataFrame({"t": [1.0, 2.0, float("nan"), None, 3.0]})
+
+    statistics = summarise_variables(data)["t"]
+
+    assert statistics["count"] == 3
+    assert statistics["nan_count"] == 2
+    assert statistics["min"] == 1.0
+    assert statistics["max"] == 3.0
+    assert statistics["mean"] == 2.0
+    assert math.isclose(statistics["std"], 1.0)
+    assert statistics["sorted"] is True
+
+
+def test_summarise_variables_of_a_text_column_counts_only():
+    data = pl.DataFrame({"state": ["on", None, "off"]})
+
+    assert summarise_variables(data) == {"state": {"count": 2, "nan_count": 1}}
+
+
+def test_summarise_variables_stores_non_finite_results_as_none():
+    data = pl.DataFrame({"v": [1.0, float("inf"), 0.5]})
+
+    statistics = summarise_variables(data)["v"]
+
+    assert statistics["max"] is None
+    assert statistics["mean"] is None
+    assert statistics["sorted"] is False
+
+
+def test_summarise_variables_of_no_columns_is_empty():
+    assert summarise_variables(pl.DataFrame()) == {}
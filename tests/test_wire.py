@@ -0,0 +1,79 @@
+import json
+import struct
+from array import array
+from io import BytesIO
+
+import msgpack
+import polars as pl
+
+from app.services.wire import (
+    ARROW_STREAM_MEDIA_TYPE,
+    FLOAT64_MAGIC,
+    FLOAT64_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    encode_arrow_stream,
+    encode_float64_columns,
+    encode_json,
+    encode_msgpack,
+    negotiate_media_type,
+)
+
+FRAME = pl.DataFrame({"t": [0.0, 1.0], "v": [2.5, None]})
+METADATA = {"id": 7, "name": "scan"}
+
+
+def test_negotiate_media_type_follows_quality_then_order():
+    assert negotiate_media_type(None) == JSON_MEDIA_TYPE
+    assert negotiate_media_type("text/html") == JSON_MEDIA_TYPE
+    assert negotiate_media_type("*/*") == JSON_MEDIA_TYPE
+    assert negotiate_media_type(FLOAT64_MEDIA_TYPE) == FLOAT64_MEDIA_TYPE
+    assert (
+        negotiate_media_type(
+            f"{JSON_MEDIA_TYPE};q=0.5, {ARROW_STREAM_MEDIA_TYPE};q=0.9"
+        )
+        == ARROW_STREAM_MEDIA_TYPE
+    )
+    assert (
+        negotiate_media_type(f"{MSGPACK_MEDIA_TYPE}, {JSON_MEDIA_TYPE}")
+        == MSGPACK_MEDIA_TYPE
+    )
+    assert negotiate_media_type(f"{MSGPACK_MEDIA_TYPE};q=0") == JSON_MEDIA_TYPE
+
+
+def test_encode_json_puts_the_rows_under_data_points():
+    content = json.loads(encode_json(FRAME, METADATA))
+
+    assert content == {
+        **METADATA,
+        "data_points": [{"t": 0.0, "v": 2.5}, {"t": 1.0, "v": None}],
+    }
+
+
+def test_encode_arrow_stream_round_trips():
+    assert pl.read_ipc_stream(BytesIO(encode_arrow_stream(FRAME))).equals(FRAME)
+
+
+def test_encode_msgpack_sends_columns():
+    content = msgpack.unpackb(encode_msgpack(FRAME, METADATA))
+
+    assert content == {
+        **METADATA,
+        "rows": 2,
+        "columns": {"t": [0.0, 1.0], "v": [2.5, None]},
+    }
+
+
+def test_encode_float64_columns_layout():
+    content = encode_float64_columns(FRAME, METADATA)
+
+    assert content[:4] == FLOAT64_MAGIC
+    (header_length,) = struct.unpack("<I", content[4:8])
+    header = json.loads(content[8 : 8 + header_length])
+    assert header == {**METADATA, "rows": 2, "columns": ["t", "v"]}
+
+    start = 8 + header_length + (-(8 + header_length) % 8)
+    assert start % 8 == 0
+    values = array("d", content[start:])
+    assert list(values[:3]) == [0.0, 1.0, 2.5]
+    assert values[3] != values[3]